@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Peak and retained memory of summarizing a large page, with and without
+the lean option.
+
+Each mode runs in a fresh interpreter. Peak is the process' max RSS,
+retained the RSS after summary() while the Document is still referenced
+(Linux only, read from /proc/self/statm). lean only lowers the retained
+memory, the peak is the same in both modes.
+
+    python benchmarks/memory.py [--size MB]
+"""
+import os
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from readability import Document
+
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'samples',
+    'si-game.sample.html')
+PARAGRAPH = '<p>%s</p>' % ('Lorem ipsum, dolor sit amet. ' * 20)
+
+
+def rss():
+    f = open('/proc/self/statm')
+    try:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1024
+    finally:
+        f.close()
+
+
+def measure(size, lean):
+    f = open(SAMPLE)
+    try:
+        sample = f.read()
+    finally:
+        f.close()
+    count = size * 1024 * 1024 / len(PARAGRAPH)
+    page = sample.replace('</body>', '<div>%s</div></body>' % (PARAGRAPH * count))
+    base = rss()
+    doc = Document(page, lean=lean)
+    del page
+    doc.summary()
+    retained = rss() - base
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    print peak, retained
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog: [options]")
+    parser.add_option('--size', type='int', default=20, help="page size in MB")
+    parser.add_option('--measure', choices=['default', 'lean'],
+        help="internal: measure one mode in this process")
+    (options, args) = parser.parse_args()
+
+    if options.measure:
+        measure(options.size, options.measure == 'lean')
+        return
+
+    print "%d MB page" % options.size
+    print "%-8s %12s %14s" % ("mode", "peak (KB)", "retained (KB)")
+    for mode in ['default', 'lean']:
+        output = subprocess.check_output([sys.executable, __file__,
+            '--size', str(options.size), '--measure', mode])
+        peak, retained = output.split()
+        print "%-8s %12s %14s" % (mode, peak, retained)
+
+
+if __name__ == '__main__':
+    main()
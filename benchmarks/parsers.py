@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""Compares the parser backends on the sample corpus.
+
+For every backend prints the time to parse all samples, the peak memory
+of a process holding all parsed samples and how close the extracted
+summaries are to the ones of the default lxml backend.
+
+    python benchmarks/parsers.py [-n repeats] [backend ...]
+"""
+import difflib
+import glob
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from readability import Document
+from readability.htmls import build_doc
+from readability.parsers import PARSERS
+from readability.parsers import get_parser
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'samples')
+
+
+def load_samples():
+    pages = []
+    for filename in sorted(glob.glob(os.path.join(SAMPLES, '*.html'))):
+        f = open(filename)
+        try:
+            pages.append(f.read())
+        finally:
+            f.close()
+    return pages
+
+
+def parse_time(backend, pages, repeats):
+    best = None
+    for i in range(repeats):
+        start = time.time()
+        for page in pages:
+            build_doc(page, backend)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def peak_memory(name):
+    """Peak RSS in KB of a fresh interpreter parsing the corpus with name,
+    minus the one of an interpreter only loading it."""
+    def run(*args):
+        output = subprocess.check_output(
+            [sys.executable, __file__, '--memory'] + list(args))
+        return int(output)
+    return run(name) - run()
+
+
+def agreement(reference, summaries):
+    ratios = []
+    for a, b in zip(reference, summaries):
+        ratios.append(difflib.SequenceMatcher(None, a, b).ratio())
+    return sum(ratios) / len(ratios)
+
+
+def summaries(backend, pages):
+    return [Document(page, parser=backend).summary() for page in pages]
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog: [options] [backend ...]")
+    parser.add_option('-n', '--repeats', type='int', default=5)
+    parser.add_option('--memory', action='store_true',
+        help="internal: parse once with the given backend and print peak RSS")
+    (options, args) = parser.parse_args()
+
+    pages = load_samples()
+    if options.memory:
+        trees = []
+        for name in args:
+            trees.extend(build_doc(page, name)[0] for page in pages)
+        print resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return
+
+    names = args or sorted(PARSERS)
+    reference = summaries(None, pages)
+    print "%-10s %10s %12s %10s" % ("backend", "parse (ms)", "memory (KB)", "agreement")
+    for name in names:
+        try:
+            backend = get_parser(name)
+        except ImportError, e:
+            print "%-10s skipped: %s" % (name, e)
+            continue
+        print "%-10s %10.1f %12d %10.3f" % (
+            name,
+            parse_time(backend, pages, options.repeats) * 1000,
+            peak_memory(name),
+            agreement(reference, summaries(backend, pages)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""Compares score_paragraphs with and without vectorized=True.
+
+Times the scoring alone, on trees prepared as summary prepares them, for
+the samples and for synthetic deep and wide pages.
+
+    python benchmarks/scoring.py [-n repeats]
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from readability import Document
+from readability import scoring
+from tests.test_complexity import linked_paragraphs
+from tests.test_complexity import nested_divs
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'samples')
+
+
+def pages():
+    for filename in sorted(glob.glob(os.path.join(SAMPLES, '*.html'))):
+        f = open(filename)
+        try:
+            yield os.path.basename(filename), f.read()
+        finally:
+            f.close()
+    for n in [50, 200]:
+        yield 'nested divs %d' % n, nested_divs(n)
+    for n in [200, 2000]:
+        yield 'linked paragraphs %d' % n, linked_paragraphs(n)
+
+
+def prepared(page, **options):
+    doc = Document(page, **options)
+    doc._html(True)
+    doc.remove_unlikely_candidates()
+    doc.transform_misused_divs_into_paragraphs()
+    return doc
+
+
+def scoring_time(page, repeats, **options):
+    doc = prepared(page, **options)
+    best = None
+    for i in range(repeats):
+        start = time.time()
+        doc.score_paragraphs()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog: [options]")
+    parser.add_option('-n', '--repeats', type='int', default=7)
+    (options, args) = parser.parse_args()
+
+    if scoring.numpy is None:
+        print "NumPy is not installed"
+        sys.exit(1)
+    print "%-22s %12s %16s %8s" % ("page", "python (ms)", "vectorized (ms)", "speedup")
+    for name, page in pages():
+        python = scoring_time(page, options.repeats)
+        vectorized = scoring_time(page, options.repeats, vectorized=True)
+        print "%-22s %12.2f %16.2f %7.1fx" % (
+            name, python * 1000, vectorized * 1000, python / vectorized)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Compares summaries of pages from a host with and without a learned
+template.
+
+Every page is summarized with its url, once without a template cache and
+once hitting the template learned from an earlier summary of the page.
+Times are CPU times.
+
+    python benchmarks/templates.py [-n repeats]
+"""
+import gc
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from readability import Document
+from readability.templates import TemplateCache
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'samples')
+URL = 'http://example.com/articles/%d.html'
+
+
+def pages():
+    for filename in sorted(glob.glob(os.path.join(SAMPLES, '*.html'))):
+        f = open(filename)
+        try:
+            yield os.path.basename(filename), f.read()
+        finally:
+            f.close()
+
+
+def summary_time(page, repeats, **options):
+    best = None
+    gc.disable()
+    try:
+        for i in range(repeats):
+            start = time.clock()
+            Document(page, url=URL % i, **options).summary()
+            elapsed = time.clock() - start
+            if best is None or elapsed < best:
+                best = elapsed
+    finally:
+        gc.enable()
+    return best
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog: [options]")
+    parser.add_option('-n', '--repeats', type='int', default=15)
+    (options, args) = parser.parse_args()
+
+    print "%-28s %11s %16s %8s" % ("page", "plain (ms)", "template (ms)", "speedup")
+    for name, page in pages():
+        cache = TemplateCache()
+        Document(page, url=URL % 0, template_cache=cache).summary()
+        plain = summary_time(page, options.repeats)
+        hits = cache.hits
+        template = summary_time(page, options.repeats, template_cache=cache)
+        if cache.hits == hits:
+            print "%-28s %11.2f %16s" % (name, plain * 1000, "no template")
+            continue
+        print "%-28s %11.2f %16.2f %7.2fx" % (
+            name, plain * 1000, template * 1000, plain / template)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""Throughput of batch.summarize_threaded from 1 to N threads.
+
+The sample corpus is repeated to give every thread enough work.
+
+    python benchmarks/threads.py [-t max_threads] [-r repeat]
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from readability.batch import summarize_threaded
+
+
+SAMPLES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'samples')
+
+
+def load_samples():
+    pages = []
+    for filename in sorted(glob.glob(os.path.join(SAMPLES, '*.html'))):
+        f = open(filename)
+        try:
+            pages.append(f.read())
+        finally:
+            f.close()
+    return pages
+
+
+def main():
+    from optparse import OptionParser
+    import multiprocessing
+    parser = OptionParser(usage="%prog: [options]")
+    parser.add_option('-t', '--threads', type='int', default=multiprocessing.cpu_count())
+    parser.add_option('-r', '--repeat', type='int', default=20)
+    (options, args) = parser.parse_args()
+
+    pages = load_samples() * options.repeat
+    # warm up imports and regexps
+    summarize_threaded(pages[:1], 1)
+
+    print "%d pages" % len(pages)
+    print "%-8s %10s %14s %8s" % ("threads", "time (s)", "pages/s", "speedup")
+    base = None
+    threads = 1
+    while threads <= options.threads:
+        start = time.time()
+        summarize_threaded(pages, threads)
+        elapsed = time.time() - start
+        if base is None:
+            base = elapsed
+        print "%-8d %10.2f %14.1f %8.2f" % (
+            threads, elapsed, len(pages) / elapsed, base / elapsed)
+        threads *= 2
+
+
+if __name__ == '__main__':
+    main()
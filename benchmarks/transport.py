@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Compares batch.summarize_pages with a plain multiprocessing.Pool.map.
+
+Pages are the si-game sample padded to the requested size. For both modes
+prints the wall time and the bytes pickled through the pool's pipes for
+the tasks and their results.
+
+    python benchmarks/transport.py [-p processes] [--pages N] [--size KB]
+"""
+import cPickle
+import os
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from readability import Document
+from readability import batch
+
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'samples',
+    'si-game.sample.html')
+PARAGRAPH = '<p>%s, and the crowd went home happy after nine innings.</p>\n'
+
+
+def make_pages(count, size):
+    f = open(SAMPLE)
+    try:
+        sample = f.read()
+    finally:
+        f.close()
+    pages = []
+    for i in range(count):
+        padding = []
+        length = len(sample)
+        while length < size:
+            paragraph = PARAGRAPH % ('Page %d paragraph %d' % (i, len(padding)))
+            padding.append(paragraph)
+            length += len(paragraph)
+        pages.append(sample.replace('</body>', '<div>%s</div></body>' % ''.join(padding)))
+    return pages
+
+
+def summarize(page):
+    return Document(page).summary()
+
+
+def pickled(obj):
+    return len(cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL))
+
+
+def run_pool_map(pages, processes):
+    pool = Pool(processes)
+    try:
+        start = time.time()
+        summaries = pool.map(summarize, pages)
+        elapsed = time.time() - start
+    finally:
+        pool.close()
+        pool.join()
+    copied = sum(pickled(page) for page in pages) + sum(pickled(s) for s in summaries)
+    return elapsed, copied, summaries
+
+
+def run_segments(pages, processes):
+    work_dir = tempfile.mkdtemp(prefix='readability-',
+        dir=batch._shared_directory())
+    try:
+        start = time.time()
+        spans, results = batch._map_spans(pages, processes, work_dir, {})
+        summaries = batch._read_summaries(results)
+        elapsed = time.time() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    # the spans and results summarize_pages sends through the pipes
+    copied = sum(pickled(s) for s in spans) + sum(pickled(r) for r in results)
+    return elapsed, copied, summaries
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog: [options]")
+    parser.add_option('-p', '--processes', type='int', default=None)
+    parser.add_option('--pages', type='int', default=16)
+    parser.add_option('--size', type='int', default=2048, help="page size in KB")
+    (options, args) = parser.parse_args()
+
+    pages = make_pages(options.pages, options.size * 1024)
+    print "%d pages of %d KB" % (len(pages), options.size)
+    print "%-14s %10s %16s" % ("mode", "time (s)", "pickled (bytes)")
+    map_time, map_copied, map_summaries = run_pool_map(pages, options.processes)
+    print "%-14s %10.2f %16d" % ("Pool.map", map_time, map_copied)
+    seg_time, seg_copied, seg_summaries = run_segments(pages, options.processes)
+    print "%-14s %10.2f %16d" % ("segments", seg_time, seg_copied)
+    if map_summaries != seg_summaries:
+        print "summaries differ!"
+
+
+if __name__ == '__main__':
+    main()
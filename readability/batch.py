@@ -0,0 +1,150 @@
+# bulk extraction helpers
+import mmap
+import os
+import shutil
+import tempfile
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+
+from readability import Document
+
+
+# state of a pool worker process, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(segment_path, output_dir, options):
+    _worker['segment'] = ''
+    if os.path.getsize(segment_path):
+        f = open(segment_path, 'rb')
+        try:
+            _worker['segment'] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+    _worker['output_path'] = os.path.join(output_dir, 'summaries-%d' % os.getpid())
+    _worker['output'] = open(_worker['output_path'], 'wb')
+    _worker['options'] = options
+
+
+def summarize_threaded(pages, threads=None, **options):
+    """Summarizes pages in a pool of threads.
+
+    lxml releases the GIL while parsing and serializing, and parsers and
+    cleaners are kept per thread, so pages are extracted partly in
+    parallel without the cost of worker processes.
+
+    :param threads: number of threads, defaults to the number of CPUs.
+
+    Other keyword arguments are Document options. Returns the summaries in
+    the order of pages.
+    """
+    pool = ThreadPool(threads)
+    try:
+        return pool.map(lambda page: Document(page, **options).summary(), pages)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _summarize_span(span):
+    offset, length, is_unicode = span
+    # a view on the shared pages, nothing is copied until decoding
+    page = buffer(_worker['segment'], offset, length)
+    if is_unicode:
+        # encoded by _map_spans, the charset the page declares doesn't apply
+        page = unicode(page, 'utf-8')
+    summary = Document(page, **_worker['options']).summary()
+
+    output = _worker['output']
+    data = summary.encode('utf-8')
+    start = output.tell()
+    output.write(data)
+    output.flush()
+    return _worker['output_path'], start, len(data)
+
+
+def _shared_directory():
+    # tmpfs keeps the segments in memory
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return None
+
+
+def summarize_pages(pages, processes=None, directory=None, **options):
+    """Summarizes pages (byte or unicode strings) in a pool of worker
+    processes.
+
+    Instead of pickling every page and summary through the pool's pipes,
+    the pages are written once to a segment file that workers memory map
+    and parse from, and workers append the UTF-8 summaries to files of
+    their own. Only the spans of the pages and summaries go through the
+    pipes.
+
+    :param processes: number of workers, defaults to the number of CPUs.
+    :param directory: where segment files are created, /dev/shm when it
+    exists.
+
+    Other keyword arguments are Document options. Returns the summaries in
+    the order of pages.
+    """
+    work_dir = tempfile.mkdtemp(prefix='readability-',
+        dir=directory or _shared_directory())
+    try:
+        spans, results = _map_spans(pages, processes, work_dir, options)
+        return _read_summaries(results)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _map_spans(pages, processes, work_dir, options):
+    """Writes pages to a segment file in work_dir and summarizes them in a
+    pool of workers, see summarize_pages.
+
+    Returns the (offset, length, is unicode) spans sent to the workers and the
+    (output path, offset, length) results they sent back, all that goes
+    through the pool's pipes.
+    """
+    segment_path = os.path.join(work_dir, 'pages')
+    spans = []
+    f = open(segment_path, 'wb')
+    try:
+        for page in pages:
+            is_unicode = isinstance(page, unicode)
+            if is_unicode:
+                page = page.encode('utf-8')
+            spans.append((f.tell(), len(page), is_unicode))
+            f.write(page)
+    finally:
+        f.close()
+    if not spans:
+        return [], []
+
+    pool = Pool(processes, _init_worker, (segment_path, work_dir, options))
+    try:
+        results = pool.map(_summarize_span, spans)
+    finally:
+        pool.close()
+        pool.join()
+    return spans, results
+
+
+def _read_summaries(results):
+    """The summaries at the results of _map_spans"""
+    outputs = {}
+    summaries = []
+    try:
+        for path, offset, length in results:
+            if not length:
+                summaries.append(u'')
+                continue
+            if path not in outputs:
+                f = open(path, 'rb')
+                try:
+                    outputs[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                finally:
+                    f.close()
+            summaries.append(outputs[path][offset:offset + length].decode('utf-8'))
+    finally:
+        for output in outputs.values():
+            output.close()
+    return summaries
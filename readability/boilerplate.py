@@ -0,0 +1,183 @@
+# prunes blocks repeated on every page of a site (navigation, footers, banners)
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from lxml.etree import iterwalk
+
+from cleaners import normalize_spaces
+
+
+BLOCK_TAGS = set(["div", "ul", "ol", "dl", "nav", "header", "footer", "aside",
+    "section", "table", "form", "p"])
+# blocks with less text than this are too generic to fingerprint
+MIN_TEXT_LENGTH = 20
+# never prune a block holding more than this share of the page's text
+MAX_TEXT_SHARE = 0.5
+
+
+def fingerprint_blocks(doc):
+    """Fingerprints every block of doc from its tag structure and normalized
+    text in one pass. Returns (elem, fingerprint, text length) for the
+    blocks with enough text, children before their parents, and the total
+    text length of the document."""
+    blocks = []
+    # (digest parts, text length) of the elements currently open
+    stack = [([], 0)]
+    for event, elem in iterwalk(doc, events=("start", "end")):
+        if event == "start":
+            text = normalize_spaces(elem.text)
+            stack.append(([str(elem.tag), text.encode('utf-8')], len(text)))
+            continue
+        parts, length = stack.pop()
+        digest = hashlib.md5('\x00'.join(parts)).hexdigest()[:16]
+        if elem.tag in BLOCK_TAGS and length >= MIN_TEXT_LENGTH:
+            blocks.append((elem, digest, length))
+        tail = normalize_spaces(elem.tail)
+        parent_parts, parent_length = stack[-1]
+        parent_parts.append(digest)
+        parent_parts.append(tail.encode('utf-8'))
+        stack[-1] = (parent_parts, parent_length + length + len(tail))
+    return blocks, stack[0][1]
+
+
+class BoilerplateIndex(object):
+    """Remembers block fingerprints per host across a batch of pages.
+
+    A block seen on at least min_pages other pages of the same host is
+    boilerplate and is pruned from the next pages of the host before they
+    are scored. At most max_entries fingerprints are kept, least recently
+    seen first out. With learn=False the index only prunes, e.g. in
+    worker processes given an index learned beforehand (see save, load
+    and merge).
+
+    Worker processes sharing what they learn should each start from
+    fork() of the shared index, or load() it, and be merged back into it:
+    merge only adds the pages an index counted itself.
+    """
+    def __init__(self, max_entries=100000, min_pages=2, learn=True):
+        self.max_entries = max_entries
+        self.min_pages = min_pages
+        self.learn = learn
+        # (host, fingerprint) -> [number of pages, last page, number of
+        # pages counted by this index rather than loaded or forked]
+        self.entries = OrderedDict()
+        self.pages = 0
+        self.pruned = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def new_page(self):
+        """An id telling pages apart when they have no url"""
+        with self.lock:
+            self.pages += 1
+            return '#%d' % self.pages
+
+    def is_boilerplate(self, host, fingerprint, page):
+        entry = self.entries.get((host, fingerprint))
+        if entry is None:
+            return False
+        pages = entry[0]
+        if entry[1] == page:
+            # don't count the page being pruned
+            pages -= 1
+        return pages >= self.min_pages
+
+    def prune(self, doc, host, page, count=True):
+        """Drops the boilerplate blocks of doc, then learns its blocks.
+        Returns the number of blocks dropped. With count=False, for a page
+        pruned before, the page is neither learned nor counted in pruned
+        again."""
+        blocks, total_length = fingerprint_blocks(doc)
+        dropped = set()
+        with self.lock:
+            # parents come before their children
+            for elem, fingerprint, length in reversed(blocks):
+                if length > total_length * MAX_TEXT_SHARE:
+                    continue
+                if not self.is_boilerplate(host, fingerprint, page):
+                    continue
+                if any(a in dropped for a in elem.iterancestors()):
+                    continue
+                dropped.add(elem)
+            if count:
+                if self.learn:
+                    for elem, fingerprint, length in blocks:
+                        self._add(host, fingerprint, page)
+                self.pruned += len(dropped)
+        for elem in dropped:
+            elem.drop_tree()
+        return len(dropped)
+
+    def _add(self, host, fingerprint, page):
+        key = (host, fingerprint)
+        entry = self.entries.pop(key, [0, None, 0])
+        if entry[1] != page:
+            entry[0] += 1
+            entry[1] = page
+            entry[2] += 1
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def fork(self):
+        """A copy of the index for a worker process, to be merged back
+        once the worker is done"""
+        with self.lock:
+            index = self.__class__(self.max_entries, self.min_pages, self.learn)
+            for key, (pages, page, counted) in self.entries.items():
+                index.entries[key] = [pages, page, 0]
+            index.pages = self.pages
+        return index
+
+    def merge(self, other):
+        """Adds the pages another index counted itself since it was
+        created, forked or loaded, e.g. in another process"""
+        with self.lock:
+            for key, (pages, page, counted) in other.entries.items():
+                if not counted:
+                    continue
+                entry = self.entries.pop(key, [0, None, 0])
+                entry[0] += counted
+                entry[2] += counted
+                self.entries[key] = entry
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+
+    def save(self, filename):
+        with self.lock:
+            data = {
+                'max_entries': self.max_entries,
+                'min_pages': self.min_pages,
+                'entries': [[host, fingerprint, pages]
+                    for (host, fingerprint), (pages, page, counted) in self.entries.items()],
+            }
+        f = open(filename, 'wt')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+
+    @classmethod
+    def load(cls, filename, learn=False):
+        f = open(filename, 'rt')
+        try:
+            data = json.load(f)
+        finally:
+            f.close()
+        index = cls(data['max_entries'], data['min_pages'], learn)
+        for host, fingerprint, pages in data['entries']:
+            index.entries[(host, str(fingerprint))] = [pages, None, 0]
+        return index
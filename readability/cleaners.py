@@ -1,5 +1,6 @@
 # strip out a set of nuisance html attributes that can mess up rendering in RSS feeds
 import re
+import threading
 from lxml.html.clean import Cleaner
 
 bad_attrs = ['style', '[-a-z]*color', 'background[-a-z]*', 'on*', "class", "id"]
@@ -19,14 +20,32 @@ def clean_attributes(html):
         html = htmlstrip.sub('<\\1\\2>', html)
     return html
 
+bad_attr_names = re.compile('(?:%s)$' % ('|'.join(bad_attrs),), re.I)
+
+def strip_attributes(node):
+    """clean_attributes on the tree instead of the serialized html"""
+    for elem in node.iter():
+        for name in elem.attrib.keys():
+            if bad_attr_names.match(name):
+                del elem.attrib[name]
+
 def normalize_spaces(s):
     if not s: return ''
     """replace any sequence of whitespace
     characters with a single space"""
     return ' '.join(s.split())
 
-html_cleaner = Cleaner(scripts=True, javascript=True, comments=True,
+CLEANER_OPTIONS = dict(scripts=True, javascript=True, comments=True,
                   style=True, links=True, meta=False, add_nofollow=False,
                   page_structure=False, processing_instructions=True, embedded=False,
                   frames=False, forms=False, annoying_tags=False, remove_tags=None,
                   remove_unknown_tags=False, safe_attrs_only=False)
+
+_local = threading.local()
+
+def get_html_cleaner():
+    """The Cleaner of the calling thread"""
+    cleaner = getattr(_local, 'html_cleaner', None)
+    if cleaner is None:
+        cleaner = _local.html_cleaner = Cleaner(**CLEANER_OPTIONS)
+    return cleaner
@@ -1,10 +1,12 @@
+import threading
+
 def save_to_file(text, filename):
     f = open(filename, 'wt')
     f.write('<meta http-equiv="Content-Type" content="text/html; charset=UTF-8" />')
     f.write(text.encode('utf-8'))
     f.close()
 
-uids = {} 
+_local = threading.local()
 def describe(node, depth=2):
     if not hasattr(node, 'tag'):
         return "[%s]" % type(node)
@@ -15,6 +17,10 @@ def describe(node, depth=2):
     if name[:4] in ['div#', 'div.']:
         name = name[3:]
     if name in ['tr', 'td', 'div', 'p']:
+        # numbering is kept per thread
+        uids = getattr(_local, 'uids', None)
+        if uids is None:
+            uids = _local.uids = {}
         if not node in uids:
             uid = uids[node] = len(uids)+1
         else:
@@ -15,6 +15,9 @@ def get_encoding(page):
             charset = match.group(1)
             break
     else:
+        if not isinstance(page, (str, bytearray)):
+            # chardet does not take buffers
+            page = str(page)
         detected = chardet.detect(page)
         if detected and "encoding" in detected:
             charset = detected["encoding"]
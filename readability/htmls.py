@@ -1,20 +1,23 @@
 from cleaners import normalize_spaces, clean_attributes
 from encoding import get_encoding
 from lxml.html import tostring
+from parsers import get_parser
 import logging
-import lxml.html
 import re, sys
 
-utf8_parser = lxml.html.HTMLParser(encoding='utf-8')
-
-def build_doc(page):
+def build_doc(page, parser=None):
+    """Parses page with the given backend, see parsers.get_parser"""
     if isinstance(page, unicode):
         enc = None
         page_unicode = page
     else:
         enc = get_encoding(page) or 'utf-8'
-        page_unicode = page.decode(enc, 'replace')
-    doc = lxml.html.document_fromstring(page_unicode.encode('utf-8', 'replace'), parser=utf8_parser)
+        # unicode() also decodes buffers, see batch.summarize_pages
+        page_unicode = unicode(page, enc, 'replace')
+    data = page_unicode.encode('utf-8', 'replace')
+    # let the decoded copy go before the tree is built
+    del page_unicode
+    doc = get_parser(parser).parse(data)
     return doc, enc
 
 def js_re(src, pattern, flags, repl):
@@ -0,0 +1,84 @@
+# parser backends turning UTF-8 encoded html into lxml.html documents
+import threading
+
+import lxml.html
+from lxml.etree import tostring
+
+
+class LxmlParser(object):
+    """libxml2's html parser, options are passed on to lxml.html.HTMLParser
+
+    Parser objects must not be shared between threads, each thread gets
+    its own.
+    """
+    def __init__(self, **options):
+        self.options = options
+        self.local = threading.local()
+
+    @property
+    def parser(self):
+        parser = getattr(self.local, 'parser', None)
+        if parser is None:
+            parser = self.local.parser = lxml.html.HTMLParser(
+                encoding='utf-8', **self.options)
+        return parser
+
+    def parse(self, data):
+        return lxml.html.document_fromstring(data, parser=self.parser)
+
+
+class Html5Parser(object):
+    """html5lib's spec compliant parser, slower but closer to browsers on
+    broken markup. Needs html5lib to be installed.
+
+    html5lib builds plain lxml.etree trees, the result is handed over to
+    libxml2 so the rest of the pipeline gets lxml.html elements.
+    """
+    def __init__(self):
+        from lxml.html import html5parser
+        self.html5parser = html5parser
+        self.local = threading.local()
+        self.html_parser = LxmlParser()
+
+    @property
+    def parser(self):
+        parser = getattr(self.local, 'parser', None)
+        if parser is None:
+            parser = self.local.parser = self.html5parser.HTMLParser(
+                namespaceHTMLElements=False)
+        return parser
+
+    def parse(self, data):
+        doc = self.html5parser.document_fromstring(
+            data.decode('utf-8'), parser=self.parser)
+        return self.html_parser.parse(
+            tostring(doc, method='html', encoding='utf-8'))
+
+
+PARSERS = {
+    'lxml': LxmlParser,
+    # lifts libxml2's limits on depth and text node size
+    'lxml-huge': lambda: LxmlParser(huge_tree=True),
+    # skips whitespace only text nodes and the id hash table
+    'lxml-lean': lambda: LxmlParser(remove_blank_text=True, collect_ids=False),
+    'html5': Html5Parser,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_parser(parser=None):
+    """Returns a backend given its name in PARSERS, the backend itself or
+    None for the default libxml2 parser."""
+    if parser is None:
+        parser = 'lxml'
+    if not isinstance(parser, basestring):
+        return parser
+    with _instances_lock:
+        if parser not in _instances:
+            if parser not in PARSERS:
+                raise ValueError("unknown parser %r, expected one of %s" % (
+                    parser, ', '.join(sorted(PARSERS))))
+            _instances[parser] = PARSERS[parser]()
+        return _instances[parser]
@@ -0,0 +1,85 @@
+# cheap one-pass estimate of how likely a page is to hold a readable article
+from lxml.etree import iterwalk
+
+PARAGRAPH_TAGS = set(["p", "pre", "td"])
+# paragraphs with at least this many characters count as "real" text
+MIN_PARAGRAPH_LENGTH = 25
+# number of real paragraphs above which a page gets the full paragraph score
+PARAGRAPHS_FOR_FULL_SCORE = 5
+# text/markup ratio above which a page gets the full ratio score
+RATIO_FOR_FULL_SCORE = 0.5
+
+
+def _length(text):
+    if not text:
+        return 0
+    return len(text.strip())
+
+
+def prescan(doc, min_paragraph_length=MIN_PARAGRAPH_LENGTH):
+    """Collects text-to-markup ratio, paragraph count and link density of
+    a parsed document in a single pass over the tree and combines them in
+    a 0..1 "is probably readable" score.
+
+    Index pages, search results and login walls tend to have little text
+    per tag, few long paragraphs and most of their text inside links.
+    """
+    text_length = 0
+    link_length = 0
+    markup_length = 0
+    paragraphs = 0
+    link_depth = 0
+    # text length of the paragraphs currently open, outermost first
+    open_paragraphs = []
+
+    for event, elem in iterwalk(doc, events=("start", "end")):
+        tag = elem.tag
+        if not isinstance(tag, basestring):
+            # comments and processing instructions
+            continue
+        if event == "start":
+            # "<tag ...>" + "</tag>"
+            markup_length += 2 * len(tag) + 5
+            for name, value in elem.attrib.items():
+                markup_length += len(name) + len(value) + 4
+            if tag == "a":
+                link_depth += 1
+            if tag in PARAGRAPH_TAGS:
+                open_paragraphs.append(0)
+            length = _length(elem.text)
+        else:
+            if tag == "a":
+                link_depth -= 1
+            if tag in PARAGRAPH_TAGS:
+                inner_length = open_paragraphs.pop()
+                if inner_length >= min_paragraph_length:
+                    paragraphs += 1
+                if open_paragraphs:
+                    open_paragraphs[-1] += inner_length
+            # the tail belongs to the parent element
+            length = _length(elem.tail)
+
+        if length:
+            text_length += length
+            if link_depth:
+                link_length += length
+            if open_paragraphs:
+                open_paragraphs[-1] += length
+
+    total_length = text_length + markup_length
+    ratio = float(text_length) / max(total_length, 1)
+    link_density = float(link_length) / max(text_length, 1)
+
+    ratio_score = min(ratio / RATIO_FOR_FULL_SCORE, 1.0)
+    paragraph_score = min(float(paragraphs) / PARAGRAPHS_FOR_FULL_SCORE, 1.0)
+    link_score = 1.0 - link_density
+    score = (ratio_score + 2 * paragraph_score + link_score) / 4.0
+
+    return {
+        'score': score,
+        'text_length': text_length,
+        'markup_length': markup_length,
+        'ratio': ratio,
+        'paragraphs': paragraphs,
+        'link_density': link_density,
+    }
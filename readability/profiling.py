@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# captures slow summaries to disk and replays them
+import cProfile
+import errno
+import hashlib
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import tempfile
+import time
+
+from readability import Document
+
+
+log = logging.getLogger()
+
+# options holding state shared by many pages, the replica profiled for a
+# slow page must not update them a second time
+STATEFUL_OPTIONS = ['profiler', 'template_cache', 'boilerplate_index', 'lean']
+
+
+def _json_options(document):
+    """Document options that can be stored and replayed, regexps are kept
+    as their pattern and other objects are dropped."""
+    options = {}
+    for name, value in document.options.items():
+        if value is None or isinstance(value, (basestring, int, long, float, bool)):
+            options[name] = value
+    for name in ['positive_keywords', 'negative_keywords']:
+        pattern = getattr(document, name)
+        if pattern is not None:
+            options[name] = {'regexp': pattern.pattern, 'flags': pattern.flags}
+    return options
+
+
+class SlowPageProfiler(object):
+    """Captures pages whose summary takes longer than threshold seconds,
+    or a random sample_rate fraction of all pages, each in a subdirectory
+    of directory.
+
+    Each capture holds the input html, the replayable options, the per
+    stage timings and cProfile stats. Sampled pages run under cProfile
+    directly, pages found slow are run a second time under cProfile,
+    without the template cache and boilerplate index of the first run.
+    """
+    def __init__(self, directory, threshold=1.0, sample_rate=0.0):
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+
+    def run(self, document, html_partial=False, to_tree=False):
+        profile = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            profile.enable()
+        start = time.time()
+        try:
+            result = document._summary(html_partial, to_tree)
+        finally:
+            elapsed = time.time() - start
+            if profile is not None:
+                profile.disable()
+
+        try:
+            if profile is None and elapsed >= self.threshold:
+                options = dict(document.options)
+                for name in STATEFUL_OPTIONS:
+                    options.pop(name, None)
+                replica = Document(document.input,
+                    positive_keywords=document.positive_keywords,
+                    negative_keywords=document.negative_keywords,
+                    **options)
+                profile = cProfile.Profile()
+                profile.runcall(replica._summary, html_partial, to_tree)
+            if profile is not None:
+                path = self.capture(document, html_partial, elapsed, profile, to_tree)
+                log.info("captured %.3fs summary in %s" % (elapsed, path))
+        except Exception:
+            # the summary is fine, losing its capture must not lose it
+            log.exception("capturing a %.3fs summary failed" % elapsed)
+        return result
+
+    def capture(self, document, html_partial, elapsed, profile, to_tree=False):
+        page = document.input
+        if isinstance(page, unicode):
+            page = page.encode('utf-8')
+        else:
+            page = str(page)
+        name = "%s-%s" % (time.strftime('%Y%m%d-%H%M%S'),
+            hashlib.md5(page).hexdigest()[:8])
+        try:
+            os.makedirs(self.directory)
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                raise
+        # unique even when threads capture the same page in the same second
+        path = tempfile.mkdtemp(prefix=name + '-', dir=self.directory)
+
+        f = open(os.path.join(path, 'input.html'), 'wb')
+        try:
+            f.write(page)
+        finally:
+            f.close()
+        f = open(os.path.join(path, 'capture.json'), 'wt')
+        try:
+            json.dump({
+                'options': _json_options(document),
+                'html_partial': html_partial,
+                'to_tree': to_tree,
+                'unicode_input': isinstance(document.input, unicode),
+                'elapsed': elapsed,
+                'timings': document.timings,
+            }, f, indent=2, sort_keys=True)
+        finally:
+            f.close()
+        profile.dump_stats(os.path.join(path, 'profile.pstats'))
+        return path
+
+
+def load_capture(path):
+    """Rebuilds the Document, html_partial flag and to_tree flag (whether
+    summary_to was called) of a capture"""
+    f = open(os.path.join(path, 'capture.json'), 'rt')
+    try:
+        capture = json.load(f)
+    finally:
+        f.close()
+    f = open(os.path.join(path, 'input.html'), 'rb')
+    try:
+        page = f.read()
+    finally:
+        f.close()
+    if capture['unicode_input']:
+        page = page.decode('utf-8')
+    options = {}
+    for name, value in capture['options'].items():
+        if isinstance(value, dict):
+            value = re.compile(value['regexp'], value['flags'])
+        options[str(name)] = value
+    return (Document(page, **options), capture['html_partial'],
+        capture.get('to_tree', False))
+
+
+def replay(path, sort='cumulative', limit=30, out=sys.stdout):
+    """Runs a captured page through the pipeline under cProfile and prints
+    the stage timings and the profile"""
+    document, html_partial, to_tree = load_capture(path)
+    profile = cProfile.Profile()
+    start = time.time()
+    if to_tree:
+        output = open(os.devnull, 'wb')
+        try:
+            profile.runcall(document.summary_to, output, html_partial=html_partial)
+        finally:
+            output.close()
+    else:
+        profile.runcall(document.summary, html_partial)
+    elapsed = time.time() - start
+    print >> out, "summary took %.3fs" % elapsed
+    for stage, seconds in sorted(document.timings.items(), key=lambda x: -x[1]):
+        print >> out, "  %-40s %8.3fs" % (stage, seconds)
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats(sort).print_stats(limit)
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog: [options] capture_directory")
+    parser.add_option('-s', '--sort', default='cumulative', help="pstats sort key")
+    parser.add_option('-l', '--limit', type='int', default=30, help="number of functions shown")
+    (options, args) = parser.parse_args()
+    if len(args) != 1:
+        parser.print_help()
+        sys.exit(1)
+    replay(args[0], options.sort, options.limit)
+
+
+if __name__ == '__main__':
+    main()
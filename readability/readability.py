@@ -1,21 +1,32 @@
 #!/usr/bin/env python
+import codecs
 import logging
 import re
 import sys
+import time
 
 from collections import defaultdict
+from functools import wraps
 from lxml.etree import tostring
 from lxml.etree import tounicode
+from lxml.etree import xmlfile
 from lxml.html import document_fromstring
+from lxml.html import XHTML_NAMESPACE
 from lxml.html import fragment_fromstring
 from urlparse import urlparse
 
 from cleaners import clean_attributes
-from cleaners import html_cleaner
+from cleaners import get_html_cleaner
+from cleaners import strip_attributes
 from htmls import build_doc
 from htmls import get_body
 from htmls import get_title
 from htmls import shorten_title
+from prescan import prescan
+import scoring
+from templates import anchored_paths
+from templates import find_anchored
+from templates import node_signature
 
 
 logging.basicConfig(level=logging.INFO)
@@ -123,9 +134,13 @@ def describe(node, depth=1):
     return name
 
 
+NEWLINES_RE = re.compile('\s*\n\s*')
+SPACES_RE = re.compile('[ \t]{2,}')
+
+
 def clean(text):
-    text = re.sub('\s*\n\s*', '\n', text)
-    text = re.sub('[ \t]{2,}', ' ', text)
+    text = NEWLINES_RE.sub('\n', text)
+    text = SPACES_RE.sub(' ', text)
     return text.strip()
 
 
@@ -135,6 +150,55 @@ def text_length(i):
 
 regexp_type = type(re.compile('hello, world'))
 
+# bytes 0x80-0xbf continue a UTF-8 sequence, the others start a character
+UTF8_CONTINUATION_BYTES = ''.join(chr(i) for i in range(0x80, 0xc0))
+
+
+class CharacterCounter(object):
+    """File object counting the characters of the UTF-8 written to it"""
+    def __init__(self):
+        self.length = 0
+
+    def write(self, data):
+        self.length += len(data.translate(None, UTF8_CONTINUATION_BYTES))
+
+
+def libxml2_encoding(encoding):
+    """The name libxml2 knows a python encoding by, e.g. ISO-8859-1 for
+    latin-1"""
+    name = codecs.lookup(encoding).name
+    if name.startswith('iso8859-'):
+        return 'ISO-8859-' + name[len('iso8859-'):]
+    return name.upper().replace('_', '-')
+
+
+class Transcoder(object):
+    """File object writing the UTF-8 written to it to stream in encoding,
+    with character references for what encoding can't represent"""
+    def __init__(self, stream, encoding):
+        self.stream = stream
+        self.encoding = encoding
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def write(self, data):
+        self.stream.write(self.decoder.decode(data).encode(
+            self.encoding, 'xmlcharrefreplace'))
+
+
+def timed(method):
+    """Adds the seconds spent in a Document method, as measured by its
+    timer, to its timings, nested stages are included in the time of the
+    outer one."""
+    name = method.__name__
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = self.timer()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.timings[name] += self.timer() - start
+    return wrapper
+
 
 def compile_pattern(elements):
     if not elements:
@@ -150,6 +214,10 @@ class Document:
     """Class to build a etree document out of html."""
     TEXT_LENGTH_THRESHOLD = 25
     RETRY_LENGTH = 250
+    # content score a remembered container needs to be used as article
+    TEMPLATE_SCORE_THRESHOLD = 20
+    # clock of the stage timings, wall time
+    timer = staticmethod(time.time)
 
     def __init__(self, input, positive_keywords=None, negative_keywords=None, **options):
         """Generate the document
@@ -165,11 +233,30 @@ class Document:
             - positive_keywords: the list of positive search patterns in classes and ids, for example: ["news-item", "block"]
             - negative_keywords: the list of negative search patterns in classes and ids, for example: ["mysidebar", "related", "ads"]
             Also positive_keywords and negative_keywords could be a regexp.
+            - min_readable_score: pages whose prescan score (0..1) is below
+              this value skip candidate scoring and return the cleaned body
+            - template_cache: a templates.TemplateCache; pages of a host seen
+              before try the remembered article container before scoring
+            - parser: name of a backend in parsers.PARSERS or an object with
+              a parse(utf8_bytes) method returning a lxml.html document
+            - profiler: a profiling.SlowPageProfiler capturing slow summaries
+            - lean: release the input and the parsed page as soon as the
+              summary is built, the document can't be summarized again;
+              lowers the memory kept afterwards, not the peak
+            - boilerplate_index: a boilerplate.BoilerplateIndex shared by the
+              pages of a batch; blocks repeated across pages of a host are
+              pruned before scoring
+            - vectorized: score paragraphs with NumPy arrays (see scoring.py),
+              same results, ignored when NumPy is not installed; faster on
+              deeply nested or large pages, slower on small ones
         """
         self.input = input
         self.options = options
         self.html = None
         self.encoding = None
+        self.link_bases = []
+        # seconds spent in each stage, see timed
+        self.timings = defaultdict(float)
         self.positive_keywords = compile_pattern(positive_keywords)
         self.negative_keywords = compile_pattern(negative_keywords)
         self.base_url = ""
@@ -178,23 +265,51 @@ class Document:
             parsed_url = urlparse(url)
             self.base_url = "%s://%s" % (parsed_url.scheme, parsed_url.hostname)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Releases the input and the tree, the document can't be used
+        afterwards"""
+        self.input = None
+        self.html = None
+
     def _html(self, force=False):
         if force or self.html is None:
+            # the previous tree can go before the new one is built
+            self.html = None
             self.html = self._parse(self.input)
         return self.html
 
+    @timed
     def _parse(self, input):
-        doc, self.encoding = build_doc(input)
-        doc = html_cleaner.clean_html(doc)
-        base_href = self.options.get('url', None)        
-        if base_href:
-            doc.make_links_absolute(base_href, resolve_base_href=True)
-        else:
-            doc.resolve_base_href()
+        if input is None:
+            raise ValueError("Document is closed")
+        doc, self.encoding = build_doc(input, self.options.get('parser', None))
+        # Cleaner.clean_html would clean a copy of the tree
+        get_html_cleaner()(doc)
+        # links are only made absolute in the article, see sanitize
+        base_href = None
+        for base in doc.xpath('//base[@href]|//x:base[@href]',
+                namespaces={'x': XHTML_NAMESPACE}):
+            base_href = base.get('href')
+            base.drop_tree()
+        self.link_bases = [href for href in [base_href, self.options.get('url', None)] if href]
         return doc
 
+    def make_links_absolute(self, node):
+        """Resolves the links below node against the <base href> of the
+        page and then the url option, as lxml's make_links_absolute"""
+        for href in self.link_bases:
+            node.make_links_absolute(href, resolve_base_href=False)
+
     def content(self):
-        return get_body(self._html(True))
+        html = self._html(True)
+        self.make_links_absolute(html)
+        return get_body(html)
 
     def title(self):
         return get_title(self._html(True))
@@ -202,6 +317,12 @@ class Document:
     def short_title(self):
         return shorten_title(self._html(True))
 
+    def prescan(self):
+        """Cheap extractability statistics of the document, see prescan.prescan"""
+        return prescan(self._html(True), self.options.get(
+            'min_text_length', self.TEXT_LENGTH_THRESHOLD))
+
+    @timed
     def get_clean_html(self):
          return clean_attributes(tounicode(self.html))
 
@@ -228,20 +349,127 @@ class Document:
         in html and body tags.
 
         """
+        return self._run_summary(html_partial, False)
+
+    def summary_to(self, stream, encoding='utf-8', html_partial=False):
+        """Write the summary of the html document to a binary file object
+
+        Attributes are stripped on the tree and lxml writes the article to
+        stream as it serializes it, the summary is never held as a string.
+        Characters encoding can't represent are written as character
+        references. Encodings libxml2 doesn't know are transcoded from
+        UTF-8 by python.
+
+        :param html_partial: as in summary.
+        """
+        # an unknown encoding fails before the page is processed
+        encoding = libxml2_encoding(encoding)
+        self._run_summary(html_partial, True)
+        self.write_html(stream, encoding)
+
+    def _run_summary(self, html_partial, to_tree):
+        profiler = self.options.get('profiler', None)
+        if profiler is not None:
+            summary = profiler.run(self, html_partial, to_tree)
+        else:
+            summary = self._summary(html_partial, to_tree)
+        if self.options.get('lean', False):
+            self.input = None
+        return summary
+
+    def write_html(self, stream, encoding='utf-8'):
+        encoding = libxml2_encoding(encoding)
+        try:
+            with xmlfile(stream, encoding=encoding) as output:
+                output.write(self.html)
+        except LookupError:
+            # raised before anything is written, libxml2 lacks the encoding
+            with xmlfile(Transcoder(stream, encoding), encoding='utf-8') as output:
+                output.write(self.html)
+
+    def html_length(self):
+        """Length of self.html once serialized, without building it"""
+        counter = CharacterCounter()
+        self.write_html(counter)
+        return counter.length
+
+    def _summary(self, html_partial=False, to_tree=False):
+        """Returns the clean html of the article, or with to_tree leaves the
+        article with stripped attributes in self.html and returns None"""
         try:
             ruthless = True
+            min_readable_score = self.options.get('min_readable_score', None)
+            template_cache = self.options.get('template_cache', None)
+            host = None
+            if template_cache is not None:
+                host = urlparse(self.options.get('url', None) or '').hostname
+            try_template = host is not None
+            boilerplate_index = self.options.get('boilerplate_index', None)
+            if boilerplate_index is not None:
+                url = self.options.get('url', None)
+                page_id = url or boilerplate_index.new_page()
+                page_host = urlparse(url or '').hostname or ''
+                page_counted = False
             while True:
                 self._html(True)
+                if min_readable_score is not None:
+                    # only the first parse needs to be checked
+                    stats = prescan(self.html, self.options.get(
+                        'min_text_length', self.TEXT_LENGTH_THRESHOLD))
+                    if stats['score'] < min_readable_score:
+                        self.debug("Prescan score %.3f below %.3f, skipping extraction" % (
+                            stats['score'], min_readable_score))
+                        article = self.html.find('body')
+                        if article is None:
+                            article = self.html
+                        return self.sanitize(article, {}, not to_tree)
+                    min_readable_score = None
+                if boilerplate_index is not None:
+                    # parsed again for a retry, pruned again but counted once
+                    pruned = boilerplate_index.prune(self.html, page_host, page_id,
+                        count=not page_counted)
+                    page_counted = True
+                    self.debug("Pruned %d boilerplate blocks" % pruned)
                 for i in self.tags(self.html, 'script', 'style'):
                     i.drop_tree()
                 for i in self.tags(self.html, 'body'):
                     i.set('id', 'readabilityBody')
                 if ruthless:
                     self.remove_unlikely_candidates()
-                self.transform_misused_divs_into_paragraphs()
-                candidates = self.score_paragraphs()
 
-                best_candidate = self.select_best_candidate(candidates)
+                best_candidate = None
+                if try_template:
+                    container = self.template_container(template_cache, host)
+                    if container is not None:
+                        # the rest of the page is neither transformed nor scored
+                        replaced = self.transform_misused_divs_into_paragraphs(container)
+                        for new, original in replaced.items():
+                            if original is container:
+                                container = new
+                        candidates, best_candidate = self.template_candidate(
+                            container, host)
+                    if best_candidate is None:
+                        template_cache.miss()
+                        try_template = False
+                        if container is not None:
+                            # the page is partly transformed, start over
+                            continue
+
+                template = None
+                if best_candidate is None:
+                    learn = ruthless and host is not None
+                    if learn:
+                        # templates point into the page before it is transformed
+                        paths = anchored_paths(self.html)
+                    replaced = self.transform_misused_divs_into_paragraphs()
+                    candidates = self.score_paragraphs()
+                    best_candidate = self.select_best_candidate(candidates)
+                    if best_candidate and learn:
+                        best_elem = best_candidate['elem']
+                        original = replaced.get(best_elem, best_elem)
+                        # the whole page would match every page of the host
+                        if original in paths and original.tag not in ('body', 'html'):
+                            template = (paths[original], node_signature(original))
 
                 if best_candidate:
                     article = self.get_article(candidates, best_candidate,
@@ -263,24 +491,75 @@ class Document:
                         if article is None:
                             article = self.html
 
-                cleaned_article = self.sanitize(article, candidates)
+                cleaned_article = self.sanitize(article, candidates, not to_tree)
 
-                article_length = len(cleaned_article or '')
+                if not to_tree:
+                    article_length = len(cleaned_article or '')
+                elif ruthless or try_template:
+                    article_length = self.html_length()
+                else:
+                    # last pass, the length decides nothing
+                    article_length = 0
                 retry_length = self.options.get(
                     'retry_length',
                     self.RETRY_LENGTH)
                 of_acceptable_length = article_length >= retry_length
+                if try_template:
+                    try_template = False
+                    if of_acceptable_length:
+                        template_cache.hit()
+                        return cleaned_article
+                    template_cache.miss()
+                    self.debug("template did not work, scoring the whole page")
+                    continue
                 if ruthless and not of_acceptable_length:
                     ruthless = False
                     # Loop through and try again.
                     continue
                 else:
+                    if template is not None and of_acceptable_length:
+                        template_cache.learn(host, *template)
                     return cleaned_article
 
         except StandardError, e:
             log.exception('error getting summary: ')
             raise Unparseable(str(e)), None, sys.exc_info()[2]
 
+    def template_container(self, template_cache, host):
+        """The element at the container remembered for host, in the page
+        not yet transformed, or None"""
+        template = template_cache.get(host)
+        if template is None:
+            return None
+        path, signature = template
+        elem = find_anchored(self.html, path)
+        if elem is None or node_signature(elem) != signature:
+            return None
+        return elem
+
+    @timed
+    def template_candidate(self, elem, host):
+        """Checks that the remembered container still looks like an
+        article, long enough, not mostly links and scoring at least
+        TEMPLATE_SCORE_THRESHOLD, before it is used as best candidate.
+
+        Only the paragraphs below the container are scored.
+        """
+        retry_length = self.options.get('retry_length', self.RETRY_LENGTH)
+        if text_length(elem) < retry_length or self.get_link_density(elem) > 0.5:
+            return None, None
+        candidates = self.score_paragraphs(elem)
+        if elem not in candidates:
+            candidates[elem] = self.score_node(elem)
+        score = candidates[elem]['content_score']
+        if score < self.TEMPLATE_SCORE_THRESHOLD:
+            self.debug("Template %s for %s only scores %6.3f" % (
+                describe(elem), host, score))
+            return None, None
+        self.debug("Using template %s for %s" % (describe(elem), host))
+        return candidates, candidates[elem]
+
+    @timed
     def get_article(self, candidates, best_candidate, html_partial=False):
         # Now that we have the top candidate, look through its siblings for
         # content that might also be related.
@@ -330,6 +609,7 @@ class Document:
                     output.getchildren()[0].getchildren()[0].append(sibling)
         return output
 
+    @timed
     def select_best_candidate(self, candidates):
         sorted_candidates = sorted(candidates.values(), key=lambda x: x['content_score'], reverse=True)
         for candidate in sorted_candidates[:5]:
@@ -344,6 +624,9 @@ class Document:
         best_candidate = sorted_candidates[0]
         return best_candidate
 
+    def inner_text(self, elem):
+        return clean(elem.text_content() or "")
+
     def get_link_density(self, elem):
         link_length = 0
         for i in elem.findall(".//a"):
@@ -353,19 +636,24 @@ class Document:
         total_length = text_length(elem)
         return float(link_length) / max(total_length, 1)
 
-    def score_paragraphs(self, ):
+    @timed
+    def score_paragraphs(self, node=None):
         MIN_LEN = self.options.get(
             'min_text_length',
             self.TEXT_LENGTH_THRESHOLD)
+        if node is None:
+            node = self._html()
+        if self.options.get('vectorized', False) and scoring.numpy is not None:
+            return scoring.score_paragraphs(self, node, MIN_LEN)
         candidates = {}
         ordered = []
-        for elem in self.tags(self._html(), "p", "pre", "td"):
+        for elem in self.tags(node, "p", "pre", "td"):
             parent_node = elem.getparent()
             if parent_node is None:
                 continue
             grand_parent_node = parent_node.getparent()
 
-            inner_text = clean(elem.text_content() or "")
+            inner_text = self.inner_text(elem)
             inner_text_len = len(inner_text)
 
             # If this paragraph is less than 25 characters
@@ -451,6 +739,7 @@ class Document:
         if self.options.get('debug', False):
             log.debug(*a)
 
+    @timed
     def remove_unlikely_candidates(self):
         for elem in self.html.iter():
             if elem.tag in UNLIKELY_TAGS:
@@ -464,9 +753,30 @@ class Document:
                 self.debug("Removing unlikely candidate - %s" % describe(elem))
                 elem.drop_tree()
 
-    def transform_misused_divs_into_paragraphs(self):
-        divsToBeAnalyzed = list(self.html.findall('.//div'))
+    @timed
+    def transform_misused_divs_into_paragraphs(self, container=None):
+        """Turns divs into paragraphs, or wraps their inline content in
+        paragraphs. Returns the divs replaced, by their replacement.
 
+        With a container only the container, its parent and the siblings
+        get_article looks at and the divs below the container are
+        transformed.
+        """
+        if container is None:
+            divsToBeAnalyzed = list(self.html.findall('.//div'))
+        else:
+            divsToBeAnalyzed = []
+            parent = container.getparent()
+            if parent is not None:
+                if parent.tag == 'div':
+                    divsToBeAnalyzed.append(parent)
+                divsToBeAnalyzed.extend(sibling for sibling in parent
+                    if sibling.tag == 'div' and sibling is not container)
+            if container.tag == 'div':
+                divsToBeAnalyzed.append(container)
+            divsToBeAnalyzed.extend(container.findall('.//div'))
+
+        replaced = {}
         for div in divsToBeAnalyzed:
             if is_empty_node(div) and div.getparent() is not None:
                 div.drop_tree()
@@ -476,7 +786,9 @@ class Document:
                 # Div contains both block elments and inline elements.
                 # Group adjacent inline elements inside paragraphs
                 childs = []
-                current_paragraph = fragment_fromstring('<p/>')
+                # fragment_fromstring would build a whole document per
+                # paragraph, makeelement creates them in the page's one
+                current_paragraph = div.makeelement('p')
 
                 if has_text(div):
                     current_paragraph.text = div.text.strip()
@@ -488,20 +800,22 @@ class Document:
                         childs.append(child)
                         # ELEMENTO BLOCO. PARAGRAFO ANTERIOR TEM QUE SER 'FECHADO'
                         # NOVO PARAGRAFO TEM QUE SER CRIADO
-                        current_paragraph = fragment_fromstring('<p/>')
+                        current_paragraph = div.makeelement('p')
                     else:
                         current_paragraph.append(child)
 
                 childs.append(current_paragraph)
-                newdiv = fragment_fromstring("<div/>")
+                newdiv = div.makeelement('div')
                 for c in childs:
                     if not is_empty_node(c):
                         newdiv.append(c)
 
                 div.getparent().replace(div, newdiv)
+                replaced[newdiv] = div
             else:
                 # The DIV can become a P
                 div.tag = "p"
+        return replaced
 
     def drop_node_and_empty_parents(self, node):
         """
@@ -526,9 +840,11 @@ class Document:
             for e in reversed(node.findall('.//%s' % tag_name)):
                 yield e
 
-    def sanitize(self, node, candidates):
+    @timed
+    def sanitize(self, node, candidates, serialize=True):
         MIN_LEN = self.options.get('min_text_length',
             self.TEXT_LENGTH_THRESHOLD)
+        self.make_links_absolute(node)
         for header in self.tags(node, "h1", "h2", "h3", "h4", "h5", "h6", "p"):
             if self.class_weight(header) < 0 or self.get_link_density(header) > 0.33:
                 self.drop_node_and_empty_parents(header)
@@ -632,8 +948,16 @@ class Document:
                         (content_score, describe(el), weight, reason))
                     self.drop_node_and_empty_parents(el)
 
+        if self.options.get('lean', False):
+            # candidates and the parent chain of node keep the whole
+            # parsed page alive, moving node to a new tree lets it go
+            candidates.clear()
+            if node.getparent() is not None:
+                fragment_fromstring('<div/>').append(node)
         self.html = node
-        return self.get_clean_html()
+        if serialize:
+            return self.get_clean_html()
+        strip_attributes(self.html)
 
 
 def main():
@@ -643,6 +967,7 @@ def main():
     parser.add_option('-u', '--url', default=None, help="use URL instead of a local file")
     parser.add_option('-p', '--positive-keywords', default=None, help="positive keywords (separated with comma)", action='store')
     parser.add_option('-n', '--negative-keywords', default=None, help="negative keywords (separated with comma)", action='store')
+    parser.add_option('-o', '--output', default=None, help="write the summary to this file, utf-8 encoded")
     (options, args) = parser.parse_args()
 
     if not (len(args) == 1 or options.url):
@@ -657,14 +982,23 @@ def main():
         file = open(args[0], 'rt')
     enc = sys.__stdout__.encoding or 'utf-8' # XXX: this hack could not always work, better to set PYTHONIOENCODING
     try:
-        print Document(file.read(),
+        doc = Document(file.read(),
             debug=options.verbose,
             url=options.url,
             positive_keywords = options.positive_keywords,
             negative_keywords = options.negative_keywords,
-        ).summary().encode(enc, 'replace')
+        )
     finally:
         file.close()
+    if options.output:
+        output = open(options.output, 'wb')
+        try:
+            doc.summary_to(output)
+        finally:
+            output.close()
+    else:
+        doc.summary_to(sys.stdout, enc)
+        sys.stdout.write('\n')
 
 if __name__ == '__main__':
     import doctest
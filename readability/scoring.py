@@ -0,0 +1,229 @@
+# paragraph scoring on a flattened, array backed copy of the tree
+import sys
+
+from lxml.etree import iterwalk
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+PARAGRAPH_TAGS = set(["p", "pre", "td"])
+
+# characters matched by \s in the regexps of readability.clean, and the
+# spaces and tabs SPACES_RE collapses
+REGEXP_SPACES = [9, 10, 11, 12, 13, 32]
+BLANKS = [9, 32]
+# characters stripped by str.strip, and by unicode.strip
+ASCII_SPACES = REGEXP_SPACES
+UNICODE_SPACES = [c for c in range(0x3001) if unichr(c).isspace()]
+
+# bit flags of the kinds of space of every code point up to the last
+# unicode space, the entry after it stands for all higher code points
+REGEXP_SPACE, BLANK, ASCII_SPACE, UNICODE_SPACE = 1, 2, 4, 8
+if numpy is not None:
+    SPACE_KINDS = numpy.zeros(UNICODE_SPACES[-1] + 2, dtype=numpy.uint8)
+    for kind, points in [(REGEXP_SPACE, REGEXP_SPACES), (BLANK, BLANKS),
+            (ASCII_SPACE, ASCII_SPACES), (UNICODE_SPACE, UNICODE_SPACES)]:
+        SPACE_KINDS[points] |= kind
+
+if sys.maxunicode > 0xffff:
+    CODE_UNITS = ('utf-32-le', 'uint32')
+else:
+    # narrow builds store, and count, unicode strings as UTF-16
+    CODE_UNITS = ('utf-16-le', 'uint16')
+
+
+class TextTable(object):
+    """The text of a tree as one array of code points, answering the length
+    of clean(text_content()) and the number of commas of any span in
+    constant time.
+
+    Every whitespace run within a span, once the span is stripped, is
+    replaced as a whole by clean: by one newline when it holds a newline,
+    otherwise each run of two or more spaces and tabs by one space. The
+    characters it saves are counted on the last character of the run, so
+    the saving within a span is a difference of cumulative sums.
+    """
+    def __init__(self, text):
+        encoding, dtype = CODE_UNITS
+        codes = numpy.frombuffer(text.encode(encoding), dtype=dtype)
+        size = len(codes)
+        # code points past the last space all map to the last entry
+        clipped = numpy.minimum(codes, len(SPACE_KINDS) - 1)
+        kinds = SPACE_KINDS[clipped]
+        spaces = (kinds & REGEXP_SPACE) > 0
+        newlines = codes == 10
+
+        saved = numpy.zeros(size + 1, dtype=numpy.intp)
+        starts, ends = runs(spaces)
+        # number of the whitespace run of every character
+        run = numpy.zeros(size, dtype=numpy.intp)
+        run[starts] = 1
+        run = numpy.cumsum(run) - 1
+        newline_runs = numpy.zeros(len(starts), dtype=bool)
+        newline_runs[run[newlines]] = True
+        in_newline_run = numpy.zeros(size, dtype=bool)
+        in_newline_run[spaces] = newline_runs[run[spaces]]
+        saved[ends[newline_runs]] = ends[newline_runs] - starts[newline_runs] - 1
+        blank_starts, blank_ends = runs(((kinds & BLANK) > 0) & ~in_newline_run)
+        saved[blank_ends] = blank_ends - blank_starts - 1
+        self.saved = numpy.cumsum(saved)
+
+        self.commas = numpy.concatenate(([0], numpy.cumsum(codes == 44)))
+        self.non_ascii = numpy.concatenate(([0], numpy.cumsum(codes > 127)))
+        # positions of the characters strip keeps
+        self.ascii_kept = numpy.flatnonzero((kinds & ASCII_SPACE) == 0)
+        self.unicode_kept = numpy.flatnonzero((kinds & UNICODE_SPACE) == 0)
+        self.size = size
+
+    def clean_lengths(self, starts, ends):
+        # lxml returns text_content as str when it is ascii, and str.strip
+        # strips fewer characters than unicode.strip
+        ascii = self.non_ascii[ends] == self.non_ascii[starts]
+        first_kept = numpy.where(ascii, self.first_kept(self.ascii_kept, starts),
+            self.first_kept(self.unicode_kept, starts))
+        last_kept = numpy.where(ascii, self.after_last_kept(self.ascii_kept, ends),
+            self.after_last_kept(self.unicode_kept, ends))
+        lengths = last_kept - first_kept - (self.saved[last_kept] - self.saved[first_kept])
+        return numpy.where(last_kept > first_kept, lengths, 0)
+
+    def first_kept(self, kept, positions):
+        """Index of the first kept character at or after positions"""
+        return numpy.concatenate((kept, [self.size]))[
+            numpy.searchsorted(kept, positions)]
+
+    def after_last_kept(self, kept, positions):
+        """Index after the last kept character before positions"""
+        return numpy.concatenate(([0], kept + 1))[
+            numpy.searchsorted(kept, positions)]
+
+    def comma_counts(self, starts, ends):
+        return self.commas[ends] - self.commas[starts]
+
+
+def runs(mask):
+    """Starts and ends (exclusive) of the runs of True in mask"""
+    edges = numpy.diff(numpy.concatenate(([0], mask.view(numpy.int8), [0])))
+    return numpy.flatnonzero(edges == 1), numpy.flatnonzero(edges == -1)
+
+
+class NodeTable(object):
+    """The elements of a tree flattened into arrays in document order,
+    starting from the parent of root, which paragraphs right below root
+    score into.
+
+    - parent: index of the parent, -1 for the first element
+    - size: number of elements in the subtree, the element included
+    - paragraph: whether the element is a p, pre or td
+    - text_length: length of clean(text_content()), as readability.text_length
+    - commas: number of commas in the text
+    - links: text length of the element when it is a link
+
+    inner is the range of positions of root and its descendants.
+    """
+    def __init__(self, root):
+        top = root.getparent()
+        if top is None:
+            top = root
+
+        nodes, parent, size, starts, ends, tags = [], [], [], [], [], []
+        texts = []
+        length = 0
+        # positions of the elements currently open
+        stack = [-1]
+        events = ("start", "end", "comment", "pi")
+        for event, elem in iterwalk(top, events=events):
+            if event == "start":
+                position = len(nodes)
+                parent.append(stack[-1])
+                stack.append(position)
+                nodes.append(elem)
+                tags.append(elem.tag)
+                starts.append(length)
+                ends.append(length)
+                size.append(1)
+                text = elem.text
+                if text:
+                    texts.append(text)
+                    length += len(text)
+                continue
+            if event == "end":
+                position = stack.pop()
+                size[position] = len(nodes) - position
+                ends[position] = length
+                if elem is root:
+                    first = position
+                if elem is top:
+                    break
+            # text_content skips comments and processing instructions
+            # but not their tail
+            text = elem.tail
+            if text:
+                texts.append(text)
+                length += len(text)
+
+        self.nodes = nodes
+        self.parent = numpy.array(parent, dtype=numpy.intp)
+        self.size = numpy.array(size, dtype=numpy.intp)
+        self.inner = first, first + size[first]
+        self.paragraph = numpy.array([tag in PARAGRAPH_TAGS for tag in tags], dtype=bool)
+        starts = numpy.array(starts, dtype=numpy.intp)
+        ends = numpy.array(ends, dtype=numpy.intp)
+        text = TextTable(u''.join(texts))
+        self.text_length = text.clean_lengths(starts, ends)
+        self.commas = text.comma_counts(starts, ends)
+        links = numpy.array([tag == "a" for tag in tags], dtype=bool)
+        self.links = numpy.where(links, self.text_length, 0)
+
+    def descendant_link_length(self):
+        """Text length of the links below every element, like summing
+        over findall('.//a')"""
+        totals = numpy.concatenate(([0], numpy.cumsum(self.links)))
+        positions = numpy.arange(len(self.nodes))
+        return totals[positions + self.size] - totals[positions + 1]
+
+
+def score_paragraphs(document, root, min_length):
+    """Array version of Document.score_paragraphs giving the same
+    candidates and scores."""
+    from readability import describe
+
+    table = NodeTable(root)
+    first, end = table.inner
+    parent = table.parent
+
+    # the paragraphs below root
+    scored = numpy.flatnonzero(table.paragraph[first + 1:end] &
+        (table.text_length[first + 1:end] >= min_length)) + first + 1
+    content = (2 + table.commas[scored] +
+        numpy.minimum(table.text_length[scored] // 100, 3))
+    parents = parent[scored]
+    grand_parents = parent[parents]
+    has_grand_parent = grand_parents >= 0
+    candidates = numpy.union1d(parents, grand_parents[has_grand_parent])
+
+    scores = numpy.zeros(len(table.nodes))
+    for i in candidates:
+        scores[i] = document.score_node(table.nodes[i])['content_score']
+    numpy.add.at(scores, parents, content)
+    numpy.add.at(scores, grand_parents[has_grand_parent],
+        content[has_grand_parent] / 2.0)
+
+    # Scale the final candidates score based on link density.
+    links = table.descendant_link_length()
+    density = links / numpy.maximum(table.text_length, 1).astype(float)
+
+    candidates_scores = {}
+    for i in candidates:
+        node = table.nodes[i]
+        score = scores[i] * (1 - density[i])
+        if document.options.get('debug', False):
+            document.debug("Candid: %6.3f %s link density %.3f -> %6.3f" % (
+                scores[i], describe(node), density[i], score))
+        candidates_scores[node] = {
+            'content_score': float(score),
+            'elem': node,
+        }
+    return candidates_scores
@@ -0,0 +1,155 @@
+# remembers where the article lives on pages of the same host
+import json
+import threading
+from collections import OrderedDict
+
+from lxml.etree import iterwalk
+
+
+def node_signature(node):
+    """Tag, id and classes of a node, stable across pages of the same site"""
+    signature = node.tag
+    if node.get('id', ''):
+        signature += '#' + node.get('id')
+    if node.get('class', ''):
+        signature += '.' + '.'.join(sorted(node.get('class').split()))
+    return signature
+
+
+def anchored_paths(root):
+    """Path of every element of root's tree relative to its nearest
+    ancestor, or itself, with an id or class: (signature of the anchor,
+    occurrence of that signature in document order, ((tag, index among
+    the siblings of that tag), ...) down from the anchor). Unlike absolute
+    paths, these survive blocks added or pruned elsewhere on the page."""
+    paths = {}
+    occurrences = {}
+    # path and child tag counts of the elements currently open
+    stack = []
+    for event, elem in iterwalk(root, events=("start", "end")):
+        if event == "end":
+            stack.pop()
+            continue
+        if stack:
+            parent_path, counts = stack[-1]
+            counts[elem.tag] = index = counts.get(elem.tag, 0) + 1
+        if not stack or elem.get('id', '') or elem.get('class', ''):
+            signature = node_signature(elem)
+            occurrences[signature] = occurrences.get(signature, 0) + 1
+            path = (signature, occurrences[signature], ())
+        else:
+            anchor, occurrence, steps = parent_path
+            path = (anchor, occurrence, steps + ((elem.tag, index),))
+        paths[elem] = path
+        stack.append((path, {}))
+    return paths
+
+
+def find_anchored(root, path):
+    """The element of root's tree at a path from anchored_paths, or None"""
+    anchor, occurrence, steps = path
+    tag = anchor.split('#')[0].split('.')[0]
+    node = None
+    for elem in root.iter(tag):
+        if node_signature(elem) == anchor:
+            occurrence -= 1
+            if not occurrence:
+                node = elem
+                break
+    for tag, index in steps:
+        if node is None:
+            break
+        children = [child for child in node if child.tag == tag]
+        node = children[index - 1] if index <= len(children) else None
+    return node
+
+
+class TemplateCache(object):
+    """Per-host cache of the element path and signature of the best candidate.
+
+    Documents given this cache through the template_cache option try the
+    remembered container first, found by its path from anchored_paths, and
+    only run the full scoring when it is missing or fails the checks. On a
+    hit the rest of the page is neither transformed nor scored. The least
+    recently used hosts are evicted once max_hosts is reached. A cache can
+    be shared between threads.
+    """
+    def __init__(self, max_hosts=1000):
+        self.max_hosts = max_hosts
+        self.templates = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.templates)
+
+    def get(self, host):
+        """Returns the (path, signature) remembered for host or None"""
+        with self.lock:
+            template = self.templates.pop(host, None)
+            if template is not None:
+                self.templates[host] = template
+            return template
+
+    def learn(self, host, path, signature):
+        with self.lock:
+            self.templates.pop(host, None)
+            self.templates[host] = (path, signature)
+            while len(self.templates) > self.max_hosts:
+                self.templates.popitem(last=False)
+
+    def hit(self):
+        with self.lock:
+            self.hits += 1
+
+    def miss(self):
+        with self.lock:
+            self.misses += 1
+
+    @property
+    def hit_rate(self):
+        return float(self.hits) / max(self.hits + self.misses, 1)
+
+    def stats(self):
+        return {
+            'hosts': len(self.templates),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+        }
+
+    def save(self, filename):
+        with self.lock:
+            data = {
+                'max_hosts': self.max_hosts,
+                'templates': self.templates.items(),
+            }
+        f = open(filename, 'wt')
+        try:
+            json.dump(data, f)
+        finally:
+            f.close()
+
+    @classmethod
+    def load(cls, filename):
+        f = open(filename, 'rt')
+        try:
+            data = json.load(f)
+        finally:
+            f.close()
+        cache = cls(data['max_hosts'])
+        for host, ((anchor, occurrence, steps), signature) in data['templates']:
+            # JSON gives the tuples of the path back as lists
+            path = (anchor, occurrence, tuple(tuple(step) for step in steps))
+            cache.learn(host, path, signature)
+        return cache
@@ -0,0 +1,170 @@
+# evaluates many option sets against one parse of a page
+import copy
+from multiprocessing import Pool
+
+from readability import Document
+
+
+# options acting on the page before scoring or keeping state across pages,
+# give url and parser to PreparedPage instead
+UNSUPPORTED_OPTIONS = ['url', 'parser', 'min_readable_score', 'template_cache',
+    'boilerplate_index', 'profiler']
+
+
+class PreparedPage(object):
+    """A page parsed and cleaned once, to be summarized with many option
+    sets.
+
+    The tree the scoring starts from only depends on whether unlikely
+    candidates are removed, so both the ruthless and the lenient trees are
+    built at most once and every summary works on a deep copy of one of
+    them. Paragraph texts and link densities do not depend on the options
+    either and are computed once per tree, shared by all the copies.
+    """
+    def __init__(self, input, url=None, parser=None):
+        self.url = url
+        document = Document(input, url=url, parser=parser)
+        self.html = document._html(True)
+        self.link_bases = document.link_bases
+        for i in document.tags(self.html, 'script', 'style'):
+            i.drop_tree()
+        for i in document.tags(self.html, 'body'):
+            i.set('id', 'readabilityBody')
+        # ruthless -> (tree, inner texts, link densities), by node number
+        self.trees = {}
+
+    def _prepare(self, ruthless):
+        document = Document(None)
+        document.html = copy.deepcopy(self.html)
+        if ruthless:
+            document.remove_unlikely_candidates()
+        document.transform_misused_divs_into_paragraphs()
+        self.trees[ruthless] = (document.html, {}, {})
+
+    def copy(self, ruthless):
+        """A copy of the tree summaries start from, the numbers of its
+        nodes and the inner text and link density caches of the tree"""
+        if ruthless not in self.trees:
+            self._prepare(ruthless)
+        tree, texts, densities = self.trees[ruthless]
+        tree = copy.deepcopy(tree)
+        numbers = dict((node, i) for i, node in enumerate(tree.iter()))
+        return tree, numbers, texts, densities
+
+    def evaluate(self, option_sets, html_partial=False):
+        """Summarizes the page with each dict of Document options in
+        option_sets. Returns one dict per option set with the summary, its
+        length and the score of the best candidate (None when the page had
+        no candidate)."""
+        results = []
+        for options in option_sets:
+            document = PreparedDocument(self, **options)
+            summary = document.summary(html_partial)
+            results.append({
+                'summary': summary,
+                'length': len(summary),
+                'score': document.best_score,
+            })
+        return results
+
+
+class PreparedDocument(Document):
+    """A Document summarizing copies of the trees of a PreparedPage"""
+    def __init__(self, page, positive_keywords=None, negative_keywords=None, **options):
+        for name in UNSUPPORTED_OPTIONS:
+            if options.get(name, None) is not None:
+                raise ValueError("%s can't be evaluated on a prepared page" % name)
+        if page.url:
+            options['url'] = page.url
+        Document.__init__(self, None, positive_keywords, negative_keywords, **options)
+        self.page = page
+        self.link_bases = page.link_bases
+        self.numbers = None
+        self.best_score = None
+
+    def _html(self, force=False):
+        if force or self.html is None:
+            # shared and already cleaned, replaced by a copy before the
+            # first change, see remove_unlikely_candidates
+            self.html = self.page.html
+            self.numbers = None
+        return self.html
+
+    def _copy(self, ruthless):
+        self.html, self.numbers, self.texts, self.densities = self.page.copy(ruthless)
+
+    def remove_unlikely_candidates(self):
+        self._copy(True)
+
+    def transform_misused_divs_into_paragraphs(self, container=None):
+        if self.numbers is None:
+            self._copy(False)
+        return {}
+
+    def inner_text(self, elem):
+        number = self.numbers and self.numbers.get(elem)
+        if number is None:
+            return Document.inner_text(self, elem)
+        if number not in self.texts:
+            self.texts[number] = Document.inner_text(self, elem)
+        return self.texts[number]
+
+    def get_link_density(self, elem):
+        number = self.numbers and self.numbers.get(elem)
+        if number is None:
+            return Document.get_link_density(self, elem)
+        if number not in self.densities:
+            self.densities[number] = Document.get_link_density(self, elem)
+        return self.densities[number]
+
+    def select_best_candidate(self, candidates):
+        best_candidate = Document.select_best_candidate(self, candidates)
+        self.best_score = best_candidate and best_candidate['content_score']
+        return best_candidate
+
+    def sanitize(self, node, candidates, serialize=True):
+        # sanitize changes the tree, the cached statistics no longer hold
+        self.numbers = None
+        return Document.sanitize(self, node, candidates, serialize)
+
+
+def evaluate(input, option_sets, url=None, html_partial=False, parser=None):
+    """Summarizes input once per dict of Document options in option_sets,
+    parsing and cleaning it only once. See PreparedPage.evaluate."""
+    return PreparedPage(input, url, parser).evaluate(option_sets, html_partial)
+
+
+# option sets of a pool worker process, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(option_sets, html_partial, parser):
+    _worker['option_sets'] = option_sets
+    _worker['html_partial'] = html_partial
+    _worker['parser'] = parser
+
+
+def _evaluate_page(page_url):
+    page, url = page_url
+    return evaluate(page, _worker['option_sets'], url,
+        _worker['html_partial'], _worker['parser'])
+
+
+def sweep(pages, option_sets, urls=None, processes=None, html_partial=False, parser=None):
+    """Evaluates every option set on every page in a pool of worker
+    processes, each page is parsed once.
+
+    :param urls: the urls of pages, when known.
+    :param processes: number of workers, defaults to the number of CPUs.
+
+    Returns the results of evaluate for each page, in the order of pages.
+    """
+    pages = list(pages)
+    if urls is None:
+        urls = [None] * len(pages)
+    pool = Pool(processes, _init_worker, (option_sets, html_partial, parser))
+    try:
+        return pool.map(_evaluate_page, zip(pages, urls))
+    finally:
+        pool.close()
+        pool.join()
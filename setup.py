@@ -22,6 +22,9 @@ setup(
         "chardet",
         lxml
         ],
+    extras_require={
+        "vectorized": ["numpy"],
+        },
     classifiers=[
         "Environment :: Web Environment",
         "Intended Audience :: Developers",
@@ -0,0 +1,47 @@
+import shutil
+import tempfile
+import unittest
+
+from readability import Document
+from readability import batch
+from readability.batch import summarize_pages
+from readability.batch import summarize_threaded
+from tests.test_article_only import load_sample
+
+
+SAMPLES = ['sample1.html', 'sample4.html', 'si-game.sample.html']
+
+
+class TestBatch(unittest.TestCase):
+    """Bulk helpers should give the same summaries as Document"""
+
+    def setUp(self):
+        self.pages = [load_sample(name) for name in SAMPLES]
+        self.expected = [Document(page).summary() for page in self.pages]
+
+    def test_summarize_pages(self):
+        self.assertEqual(self.expected, summarize_pages(self.pages, processes=2))
+
+    def test_unicode_pages(self):
+        # the declared charset only applies to byte strings
+        page = (u'<html><head><meta charset="iso-8859-1"></head><body>'
+            u'<div><p>%s</p></div></body></html>' % (u'Caf\xe9 au lait, cr\xe8me br\xfbl\xe9e. ' * 20))
+        expected = Document(page).summary()
+        self.assertTrue(u'Caf\xe9' in expected)
+        self.assertEqual([expected, self.expected[0]],
+            summarize_pages([page, self.pages[0]], processes=2))
+
+    def test_summarize_threaded(self):
+        self.assertEqual(self.expected * 4, summarize_threaded(self.pages * 4, threads=4))
+
+    def test_only_spans_go_through_the_pipes(self):
+        work_dir = tempfile.mkdtemp()
+        try:
+            spans, results = batch._map_spans(self.pages, 2, work_dir, {})
+            self.assertEqual(self.expected, batch._read_summaries(results))
+        finally:
+            shutil.rmtree(work_dir)
+        self.assertEqual([len(page) for page in self.pages],
+            [length for offset, length, is_unicode in spans])
+        self.assertEqual([len(summary.encode('utf-8')) for summary in self.expected],
+            [length for path, offset, length in results])
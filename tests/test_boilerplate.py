@@ -0,0 +1,69 @@
+import pickle
+import unittest
+
+from readability import Document
+from readability.boilerplate import BoilerplateIndex
+
+
+NAV = '<div class="nav"><ul>%s</ul></div>' % ''.join(
+    '<li><a href="/section/%d">Section number %d</a></li>' % (i, i) for i in range(10))
+FOOTER = ('<div class="site-info"><p>Copyright Example News, all rights reserved. '
+    'Contact us, privacy policy.</p></div>')
+
+
+def site_page(i):
+    story = ''.join('<p>Story %d paragraph %d, with plenty of words, commas, '
+        'and text to be scored well.</p>' % (i, j) for j in range(8))
+    return '<html><body>%s<div class="story">%s</div>%s</body></html>' % (
+        NAV, story, FOOTER)
+
+
+class TestBoilerplateIndex(unittest.TestCase):
+    """Blocks repeated across pages of a host should be pruned"""
+
+    def summarize(self, index, i):
+        return Document(site_page(i), url='http://example.com/%d' % i,
+            boilerplate_index=index).summary()
+
+    def test_repeated_blocks_are_pruned(self):
+        index = BoilerplateIndex(min_pages=2)
+        for i in range(2):
+            self.summarize(index, i)
+        self.assertEqual(0, index.pruned)
+        summary = self.summarize(index, 2)
+        # the navigation and the footer
+        self.assertEqual(2, index.pruned)
+        self.assertTrue('Story 2 paragraph 7' in summary)
+        self.assertFalse('Copyright' in summary)
+
+    def test_shared_with_other_processes(self):
+        index = BoilerplateIndex()
+        for i in range(3):
+            self.summarize(index, i)
+        nav = [key for key, (pages, page, counted) in index.entries.items() if pages == 3]
+        self.assertTrue(nav)
+
+        # workers start from the shared index and each see one more page
+        workers = [pickle.loads(pickle.dumps(index.fork())) for i in range(2)]
+        for i, worker in enumerate(workers):
+            self.summarize(worker, 3 + i)
+        for worker in workers:
+            index.merge(pickle.loads(pickle.dumps(worker)))
+        self.assertEqual([5] * len(nav), [index.entries[key][0] for key in nav])
+
+    def test_bounded(self):
+        index = BoilerplateIndex(max_entries=10)
+        for i in range(3):
+            self.summarize(index, i)
+        self.assertEqual(10, len(index))
+        copy = pickle.loads(pickle.dumps(index))
+        self.assertEqual(index.entries, copy.entries)
+
+    def test_retries_are_counted_once(self):
+        index = BoilerplateIndex(min_pages=2)
+        for i in range(2):
+            self.summarize(index, i)
+        # too short for the ruthless pass, parsed a second time
+        Document(site_page(2), url='http://example.com/2', boilerplate_index=index,
+            retry_length=100000).summary()
+        self.assertEqual(2, index.pruned)
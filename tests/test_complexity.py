@@ -0,0 +1,207 @@
+import gc
+import math
+import time
+import unittest
+
+from readability import Document
+
+
+TEXT = 'The quick brown fox, having jumped over the lazy dog, ran into the woods. '
+
+
+def page(body):
+    return '<html><head><title>Synthetic</title></head><body>%s</body></html>' % body
+
+
+def letters(i):
+    """Distinct alphabetic names, attribute patterns do not allow digits"""
+    name = ''
+    while True:
+        name += chr(ord('a') + i % 26)
+        i //= 26
+        if not i:
+            return name
+
+
+def nested_divs(n):
+    return page('<div class="content">' * n + '<p>%s</p>' % (TEXT * 4) +
+        ('<p>%s</p></div>' % TEXT) * n)
+
+
+def sibling_paragraphs(n):
+    return page('<div class="article">%s</div>' % ''.join(
+        '<p>%d %s</p>' % (i, TEXT) for i in range(n)))
+
+
+def linked_paragraphs(n):
+    return page('<div class="article">%s</div>' % ''.join(
+        '<p>%s <a href="/a%d">link %d</a> and <a href="/b%d">more</a></p>' % (TEXT, i, i, i)
+        for i in range(n)))
+
+
+def stripped_attributes(n):
+    attributes = ' '.join('background-%s="#fff" data-%s="x"' % (letters(i), letters(i))
+        for i in range(n))
+    return page('<div class="article">%s</div>' % ''.join(
+        '<p %s>%s</p>' % (attributes, TEXT) for i in range(20)))
+
+
+def article_siblings(n):
+    return page('<div class="article">%s</div>' % ('<p>%s</p>' % (TEXT * 3) * 5) +
+        '<p>Short line.</p>' * n)
+
+
+def class_variety(n):
+    return page('<div class="article">%s</div>' % ''.join(
+        '<div class="block-%s item-%s"><p>%s</p></div>' % (letters(i), letters(i * 7), TEXT)
+        for i in range(n)))
+
+
+# axis: (document generator, N), documents are built for N, 2N and 4N,
+# N is chosen so a summary of the smallest takes tens of milliseconds
+AXES = {
+    # libxml2 stops nesting at depth 256
+    'depth': (nested_divs, 60),
+    'siblings': (sibling_paragraphs, 400),
+    'links': (linked_paragraphs, 300),
+    'attributes': (stripped_attributes, 40),
+    'classes': (class_variety, 300),
+    'article siblings': (article_siblings, 1000),
+}
+
+# linear stages, with room for timing noise
+DEFAULT_EXPONENT = 1.4
+
+# known super-linear stages, these budgets should only ever go down
+ALLOWED_EXPONENTS = {
+    # get_link_density walks the subtree of every nested candidate
+    ('depth', 'score_paragraphs'): 2.1,
+    # clean_attributes removes one attribute per tag on every pass
+    ('attributes', 'get_clean_html'): 2.1,
+    # the cleaner drops attributes one by one, each found by a linear scan
+    ('attributes', '_parse'): 2.1,
+    # the checks of every nested div read the text of its whole subtree
+    ('depth', 'sanitize'): 2.1,
+    # contains_one_or_more_tags searches the subtree of every nested div
+    ('depth', 'transform_misused_divs_into_paragraphs'): 2.1,
+}
+
+# timed stages calling other timed stages, their own time is checked
+NESTED_STAGES = {
+    'sanitize': ['get_clean_html'],
+    'template_candidate': ['score_paragraphs'],
+}
+
+# stages faster than this on the largest document are only timer noise
+MIN_SECONDS = 0.0001
+REPEATS = 7
+
+
+class CpuTimedDocument(Document):
+    # process CPU time, other processes don't slow it down
+    timer = staticmethod(time.clock)
+
+
+def stage_timings(html):
+    """CPU time of each stage in a summary of html, without the time of
+    the stages nested in it"""
+    doc = CpuTimedDocument(html)
+    # collections would be counted in whichever stage triggers them
+    gc.collect()
+    gc.disable()
+    try:
+        doc.summary()
+    finally:
+        gc.enable()
+    timings = dict(doc.timings)
+    for stage, nested in NESTED_STAGES.items():
+        if stage in timings:
+            timings[stage] -= sum(doc.timings.get(n, 0) for n in nested)
+    return timings
+
+
+def fastest_timings(pages):
+    """Fastest time of each stage for each page over REPEATS rounds, the
+    pages take turns so that they all see the same load on the machine"""
+    best = [{} for page in pages]
+    for i in range(REPEATS):
+        for page, fastest in zip(pages, best):
+            for stage, seconds in stage_timings(page).items():
+                fastest[stage] = min(fastest.get(stage, seconds), seconds)
+    return best
+
+
+def sizes(n):
+    return [n, 2 * n, 4 * n]
+
+
+def growth_exponent(sizes, seconds):
+    """Slope of the least squares line through log(seconds) over log(sizes)"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(s, 1e-6)) for s in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) /
+        sum((x - mean_x) ** 2 for x in xs))
+
+
+class TestComplexity(unittest.TestCase):
+    """No stage of the pipeline should grow faster than its budget
+
+    Synthetic documents are grown along one axis at a time and the growth
+    exponent of every stage in Document.timings is fitted from the CPU
+    time spent in it at the three sizes.
+    """
+    # axis -> timings at the three sizes, shared by the tests
+    timings = {}
+
+    def axis_timings(self, axis):
+        if axis not in self.timings:
+            generate, n = AXES[axis]
+            self.timings[axis] = fastest_timings(
+                [generate(size) for size in sizes(n)])
+        return self.timings[axis]
+
+    def checked_stages(self, axis):
+        """Stages taking long enough to be checked on axis"""
+        return [stage for stage, seconds in self.axis_timings(axis)[-1].items()
+            if seconds >= MIN_SECONDS]
+
+    def check_axis(self, axis):
+        n = AXES[axis][1]
+        timings = self.axis_timings(axis)
+        failures = []
+        for stage in sorted(self.checked_stages(axis)):
+            seconds = [t.get(stage, 0) for t in timings]
+            exponent = growth_exponent(sizes(n), seconds)
+            allowed = ALLOWED_EXPONENTS.get((axis, stage), DEFAULT_EXPONENT)
+            if exponent > allowed:
+                failures.append("%s grows as N^%.2f (allowed %.2f): %s" % (
+                    stage, exponent, allowed,
+                    ', '.join('%.4fs' % s for s in seconds)))
+        self.assertFalse(failures, "%s axis:\n%s" % (axis, '\n'.join(failures)))
+
+    def test_depth(self):
+        self.check_axis('depth')
+
+    def test_siblings(self):
+        self.check_axis('siblings')
+
+    def test_links(self):
+        self.check_axis('links')
+
+    def test_attributes(self):
+        self.check_axis('attributes')
+
+    def test_classes(self):
+        self.check_axis('classes')
+
+    def test_article_siblings(self):
+        self.check_axis('article siblings')
+
+    def test_every_stage_is_checked(self):
+        ran, checked = set(), set()
+        for axis in AXES:
+            ran.update(self.axis_timings(axis)[-1])
+            checked.update(self.checked_stages(axis))
+        self.assertEqual(set(), ran - checked)
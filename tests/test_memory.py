@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from readability import Document
+from readability.readability import Unparseable
+from tests.test_article_only import load_sample
+
+try:
+    import resource
+except ImportError:
+    # not on Windows
+    resource = None
+
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+MEASURE = """
+import resource
+from readability import Document
+from tests.test_memory import large_page
+page = large_page(%d)
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+Document(page, **%r).summary()
+print resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+"""
+
+
+def large_page(size):
+    """The si-game sample padded with paragraphs to size MB"""
+    sample = load_sample('si-game.sample.html')
+    paragraph = '<p>%s</p>' % ('Lorem ipsum, dolor sit amet. ' * 20)
+    count = size * 1024 * 1024 / len(paragraph)
+    return sample.replace('</body>', '<div>%s</div></body>' % (paragraph * count))
+
+
+class TestLeanDocument(unittest.TestCase):
+    """A lean document should not keep the page around once summarized"""
+
+    def test_lean_summary_is_unchanged(self):
+        sample = load_sample('si-game.sample.html')
+        doc = Document(sample, lean=True)
+        self.assertEqual(Document(sample).summary(), doc.summary())
+        self.assertEqual(None, doc.input)
+        # the article no longer hangs from the parsed page
+        self.assertEqual(None, doc.html.getroottree().getroot().find('head'))
+
+    def test_close(self):
+        with Document(load_sample('sample1.html')) as doc:
+            doc.summary()
+        self.assertEqual(None, doc.input)
+        self.assertEqual(None, doc.html)
+        self.assertRaises(Unparseable, doc.summary)
+
+
+class TestPeakMemory(unittest.TestCase):
+    """Max RSS of summarizing a large page, measured in a fresh interpreter
+    as benchmarks/memory.py does"""
+
+    def setUp(self):
+        if resource is None or not sys.platform.startswith('linux'):
+            self.skipTest("ru_maxrss is only in KB on Linux")
+
+    def peak(self, size, **options):
+        """KB the max RSS grows by while summarizing a page of size MB"""
+        output = subprocess.check_output([sys.executable, '-c',
+            MEASURE % (size, options)], cwd=ROOT)
+        return int(output)
+
+    def test_peak_is_bounded(self):
+        # the tree used to be cleaned on a copy and every paragraph wrapper
+        # parsed as a document of its own, peaking at about 33 times the
+        # page, in place cleaning and makeelement brought it to about 22
+        peak = self.peak(2)
+        self.assertTrue(peak < 27 * 2 * 1024, "peak grew by %d KB" % peak)
+
+    def test_lean_does_not_raise_peak(self):
+        peak = self.peak(2)
+        lean_peak = self.peak(2, lean=True)
+        self.assertTrue(lean_peak <= peak * 1.1,
+            "lean peak grew by %d KB, default %d KB" % (lean_peak, peak))
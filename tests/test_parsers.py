@@ -0,0 +1,55 @@
+import unittest
+
+import lxml.html
+
+from readability import Document
+from readability.readability import Unparseable
+from tests.test_article_only import load_sample
+
+try:
+    import html5lib
+except ImportError:
+    html5lib = None
+
+
+class CountingParser(object):
+    """A custom backend, libxml2's parser counting its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def parse(self, data):
+        self.calls += 1
+        return lxml.html.document_fromstring(data,
+            parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+
+class TestParsers(unittest.TestCase):
+    """The parser option picks the backend building the tree"""
+
+    def setUp(self):
+        self.sample = load_sample('si-game.sample.html')
+        self.expected = Document(self.sample).summary()
+
+    def test_huge(self):
+        self.assertEqual(self.expected, Document(self.sample, parser='lxml-huge').summary())
+
+    def test_custom_object(self):
+        parser = CountingParser()
+        self.assertEqual(self.expected, Document(self.sample, parser=parser).summary())
+        self.assertTrue(parser.calls >= 1)
+
+    def test_unknown_name(self):
+        doc = Document(self.sample, parser='no-such-parser')
+        try:
+            doc.summary()
+        except Unparseable, e:
+            self.assertTrue('unknown parser' in str(e), str(e))
+        else:
+            self.fail("Unparseable not raised")
+
+    def test_html5(self):
+        if html5lib is None:
+            self.skipTest("html5lib is not installed")
+        summary = Document(self.sample, parser='html5').summary()
+        self.assertTrue('<p>' in summary)
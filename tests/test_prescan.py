@@ -0,0 +1,26 @@
+import unittest
+
+from readability import Document
+from tests.test_article_only import load_sample
+
+
+LINK_LIST = '<html><body><ul>%s</ul></body></html>' % ''.join(
+    '<li><a href="/result/%d">Search result number %d</a></li>' % (i, i)
+    for i in range(50))
+
+
+class TestPrescan(unittest.TestCase):
+    """The prescan should tell articles from link listings cheaply"""
+
+    def test_article_scores_higher_than_link_list(self):
+        article = Document(load_sample('si-game.sample.html')).prescan()
+        listing = Document(LINK_LIST).prescan()
+        self.assertTrue(article['paragraphs'] > 0)
+        self.assertEqual(1.0, listing['link_density'])
+        self.assertTrue(article['score'] > listing['score'])
+
+    def test_min_readable_score_skips_scoring(self):
+        """Pages below the threshold never reach score_paragraphs"""
+        doc = Document(LINK_LIST, min_readable_score=0.5)
+        doc.score_paragraphs = None
+        self.assertEqual('<body/>', doc.summary())
@@ -0,0 +1,94 @@
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from readability import Document
+from readability.boilerplate import BoilerplateIndex
+from readability.profiling import SlowPageProfiler
+from readability.profiling import load_capture
+from readability.profiling import replay
+from readability.templates import TemplateCache
+from tests.test_article_only import load_sample
+
+
+class TestSlowPageProfiler(unittest.TestCase):
+    """With threshold=0 every page is captured"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.profiler = SlowPageProfiler(self.directory, threshold=0)
+        self.sample = load_sample('si-game.sample.html')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def captures(self):
+        return [os.path.join(self.directory, name)
+            for name in sorted(os.listdir(self.directory))]
+
+    def test_capture_is_written(self):
+        summary = Document(self.sample, profiler=self.profiler).summary()
+        self.assertEqual(Document(self.sample).summary(), summary)
+        [path] = self.captures()
+        for name in ['input.html', 'capture.json', 'profile.pstats']:
+            self.assertTrue(os.path.exists(os.path.join(path, name)))
+        capture = json.load(open(os.path.join(path, 'capture.json')))
+        self.assertTrue('sanitize' in capture['timings'])
+
+    def test_round_trip(self):
+        Document(self.sample, profiler=self.profiler,
+            positive_keywords=re.compile('article', re.I),
+            negative_keywords=['sidebar', 'related'],
+            min_text_length=30).summary(html_partial=True)
+        [path] = self.captures()
+        document, html_partial, to_tree = load_capture(path)
+        self.assertEqual(True, html_partial)
+        self.assertEqual(False, to_tree)
+        self.assertEqual(30, document.options['min_text_length'])
+        self.assertEqual('article', document.positive_keywords.pattern)
+        self.assertEqual(re.I, document.positive_keywords.flags & re.I)
+        self.assertTrue(document.negative_keywords.search('related'))
+        self.assertEqual(Document(self.sample, min_text_length=30,
+                positive_keywords=re.compile('article', re.I),
+                negative_keywords=['sidebar', 'related']).summary(True),
+            document.summary(html_partial))
+
+        out = io.BytesIO()
+        replay(path, out=out)
+        self.assertTrue(out.getvalue().startswith('summary took'))
+
+    def test_summary_to_is_replayed_as_such(self):
+        Document(self.sample, profiler=self.profiler).summary_to(io.BytesIO())
+        [path] = self.captures()
+        self.assertEqual(True, load_capture(path)[2])
+        out = io.BytesIO()
+        replay(path, out=out)
+        self.assertTrue('summary_to' in out.getvalue())
+
+    def test_capture_failure_keeps_summary(self):
+        profiler = SlowPageProfiler(os.path.join(self.directory, 'file'), threshold=0)
+        open(profiler.directory, 'w').close()
+        summary = Document(self.sample, profiler=profiler).summary()
+        self.assertEqual(Document(self.sample).summary(), summary)
+
+    def test_same_page_captured_twice(self):
+        directory = os.path.join(self.directory, 'new')
+        profiler = SlowPageProfiler(directory, threshold=0)
+        for i in range(2):
+            Document(self.sample, profiler=profiler).summary()
+        self.assertEqual(2, len(os.listdir(directory)))
+
+    def test_shared_state_is_updated_once(self):
+        cache = TemplateCache()
+        Document(self.sample, profiler=self.profiler, template_cache=cache,
+            url='http://example.com/a').summary()
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+        index = BoilerplateIndex(min_pages=2)
+        Document(self.sample, profiler=self.profiler, boilerplate_index=index).summary()
+        Document(self.sample, boilerplate_index=index).summary()
+        self.assertEqual(0, index.pruned)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from lxml.html import fragment_fromstring
+
+from readability import Document
+from readability import scoring
+from readability.readability import text_length
+from tests.test_article_only import load_sample
+
+
+SAMPLES = ['sample1.html', 'sample4.html', 'sample5.html', 'si-game.sample.html']
+
+
+def scores(doc, node=None):
+    """Candidate scores keyed by the path of the candidate"""
+    tree = doc.html.getroottree()
+    return sorted((tree.getpath(elem), candidate['content_score'])
+        for elem, candidate in doc.score_paragraphs(node).items())
+
+
+def prepared(sample, **options):
+    doc = Document(sample, **options)
+    doc._html(True)
+    doc.remove_unlikely_candidates()
+    doc.transform_misused_divs_into_paragraphs()
+    return doc
+
+
+class TestVectorizedScoring(unittest.TestCase):
+    """The NumPy scoring should give exactly the pure Python results"""
+
+    def setUp(self):
+        if scoring.numpy is None:
+            self.skipTest("NumPy is not installed")
+
+    def test_same_candidates_and_scores(self):
+        for name in SAMPLES:
+            sample = load_sample(name)
+            self.assertEqual(scores(prepared(sample)),
+                scores(prepared(sample, vectorized=True)), name)
+
+    def test_same_scores_below_a_node(self):
+        """Template candidates score a subtree, see Document.template_candidate"""
+        sample = load_sample('si-game.sample.html')
+        python, vectorized = prepared(sample), prepared(sample, vectorized=True)
+        for div in python.html.findall('.//div')[:10]:
+            path = python.html.getroottree().getpath(div)
+            self.assertEqual(scores(python, div),
+                scores(vectorized, vectorized.html.xpath(path)[0]), path)
+
+    def test_text_lengths(self):
+        """clean() collapses whitespace across element boundaries and
+        strips unicode spaces only from non-ascii text"""
+        div = fragment_fromstring(u'<div> a \n<b>\t b, </b>\xa0c<!-- x -->  d'
+            u'<p> \u3000e \n</p>  <p>\r\n  f  \t g</p>  \x0b<i>h\xa0</i> </div>')
+        table = scoring.NodeTable(div)
+        self.assertEqual([text_length(node) for node in table.nodes],
+            list(table.text_length))
+        self.assertEqual([node.text_content().count(',') for node in table.nodes],
+            list(table.commas))
+
+    def test_same_summary(self):
+        sample = load_sample('si-game.sample.html')
+        self.assertEqual(Document(sample).summary(),
+            Document(sample, vectorized=True).summary())
@@ -0,0 +1,48 @@
+import io
+import unittest
+
+from readability import Document
+from tests.test_article_only import load_sample
+
+
+SAMPLES = ['sample1.html', 'sample3.html', 'si-game.sample.html']
+
+
+class TestSummaryTo(unittest.TestCase):
+    """summary_to writes the same html summary returns"""
+
+    def test_same_as_summary(self):
+        for name in SAMPLES:
+            sample = load_sample(name)
+            for html_partial in (False, True):
+                stream = io.BytesIO()
+                Document(sample).summary_to(stream, html_partial=html_partial)
+                self.assertEqual(
+                    Document(sample).summary(html_partial).encode('utf-8'),
+                    stream.getvalue())
+
+    def test_encoding(self):
+        stream = io.BytesIO()
+        Document(u'<html><body><div><p>%s</p></div></body></html>' % (
+            u'caf\xe9 cr\xe8me, ' * 20)).summary_to(stream, 'ascii')
+        self.assertTrue('caf&#233; cr&#232;me, ' in stream.getvalue())
+
+    def test_python_encoding_names(self):
+        page = u'<html><body><div><p>%s</p></div></body></html>' % (
+            u'caf\xe9 \u2192 cr\xe8me, ' * 20)
+        expected = Document(page).summary()
+        for encoding in ['latin-1', 'cp437', 'euc_jp']:
+            stream = io.BytesIO()
+            Document(page).summary_to(stream, encoding)
+            self.assertEqual(expected.encode(encoding, 'xmlcharrefreplace'),
+                stream.getvalue(), encoding)
+        self.assertRaises(LookupError, Document(page).summary_to,
+            io.BytesIO(), 'no-such-encoding')
+
+    def test_attributes_are_stripped(self):
+        stream = io.BytesIO()
+        Document('<html><body><div><p style="color: red" onclick="x()" title="t">%s</p>'
+            '</div></body></html>' % ('Some text, ' * 20)).summary_to(stream)
+        self.assertTrue('style=' not in stream.getvalue())
+        self.assertTrue('onclick=' not in stream.getvalue())
+        self.assertTrue('title="t"' in stream.getvalue())
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from lxml.html import fromstring
+
+from readability import Document
+from readability.templates import TemplateCache
+from readability.templates import find_anchored
+from tests.test_article_only import load_sample
+
+
+URL = 'http://sportsillustrated.cnn.com/baseball/mlb/gameflash/2012/04/16/40630_preview.html'
+
+
+class TestTemplateCache(unittest.TestCase):
+    """Pages of a host seen before should reuse the remembered container"""
+
+    def test_second_page_hits_template(self):
+        sample = load_sample('si-game.sample.html')
+        cache = TemplateCache()
+        first = Document(sample, url=URL, template_cache=cache).summary()
+        second = Document(sample, url=URL, template_cache=cache).summary()
+        self.assertEqual(first, second)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(1, len(cache))
+
+    def test_template_survives_shifted_blocks(self):
+        sample = load_sample('si-game.sample.html')
+        cache = TemplateCache()
+        Document(sample, url=URL, template_cache=cache).summary()
+        # indexes from the root change, the path from the anchor does not
+        shifted = sample.replace('<body>', '<body><div class="promo"><div>'
+            'Subscribe</div></div><div>Breaking</div>', 1)
+        self.assertNotEqual(shifted, sample)
+        summary = Document(shifted, url=URL, template_cache=cache).summary()
+        self.assertEqual(Document(shifted, url=URL).summary(), summary)
+        self.assertEqual(1, cache.hits)
+
+    def test_learned_template_is_persistable(self):
+        sample = load_sample('si-game.sample.html')
+        cache = TemplateCache()
+        Document(sample, url=URL, template_cache=cache).summary()
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            cache.save(filename)
+            loaded = TemplateCache.load(filename)
+        finally:
+            os.remove(filename)
+        Document(sample, url=URL, template_cache=loaded).summary()
+        self.assertEqual(1, loaded.hits)
+
+    def test_whole_body_is_not_learned(self):
+        cache = TemplateCache()
+        Document(load_sample('sample4.html'), url=URL, template_cache=cache).summary()
+        self.assertEqual(0, len(cache))
+        sample = load_sample('si-game.sample.html')
+        summary = Document(sample, url=URL, template_cache=cache).summary()
+        self.assertEqual(Document(sample, url=URL).summary(), summary)
+        self.assertEqual(0, cache.hits)
+
+    def test_weak_container_on_other_page_misses(self):
+        article = '<p>%s</p>' % ('Lorem ipsum, dolor sit amet, consectetur. ' * 10)
+        learned = ('<html><body><div class="content">%s</div>'
+            '<div class="related"><p>Other stories</p></div></body></html>') % (article * 6)
+        # same template, but the container is one long sentence
+        other = ('<html><body><div class="content"><p>%s</p></div>'
+            '<div class="related">%s</div></body></html>') % (
+            'Lorem ipsum dolor sit amet ' * 20, article * 6)
+        cache = TemplateCache()
+        Document(learned, url=URL, template_cache=cache).summary()
+        self.assertEqual(1, len(cache))
+        summary = Document(other, url=URL, template_cache=cache).summary()
+        self.assertEqual(Document(other, url=URL).summary(), summary)
+        self.assertEqual(0, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_bounded_and_persistable(self):
+        path = ('div.wrap', 1, (('div', 2),))
+        cache = TemplateCache(max_hosts=2)
+        for host in ['a.com', 'b.com', 'c.com']:
+            cache.learn(host, path, 'div')
+        self.assertEqual(['b.com', 'c.com'], list(cache.templates))
+
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            cache.save(filename)
+            loaded = TemplateCache.load(filename)
+        finally:
+            os.remove(filename)
+        self.assertEqual(2, loaded.max_hosts)
+        self.assertEqual((path, 'div'), loaded.get('c.com'))
+        page = fromstring('<html><body><div class="wrap"><div>Menu</div>'
+            '<div>Article</div></div></body></html>')
+        self.assertEqual('Article', find_anchored(page, loaded.get('c.com')[0]).text)
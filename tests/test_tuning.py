@@ -0,0 +1,49 @@
+import unittest
+
+from readability import Document
+from readability.tuning import PreparedPage
+from readability.tuning import evaluate
+from readability.tuning import sweep
+from tests.test_article_only import load_sample
+
+
+SAMPLES = ['sample1.html', 'sample4.html', 'si-game.sample.html']
+
+OPTION_SETS = [
+    {},
+    {'positive_keywords': 'article,content', 'negative_keywords': 'sidebar,comment'},
+    {'min_text_length': 100},
+    {'retry_length': 5000},
+]
+
+
+class TestEvaluate(unittest.TestCase):
+    """Option sets evaluated on one parse give the summaries of Document"""
+
+    def test_same_as_document(self):
+        for name in SAMPLES:
+            sample = load_sample(name)
+            for html_partial in (False, True):
+                results = evaluate(sample, OPTION_SETS, html_partial=html_partial)
+                self.assertEqual(
+                    [Document(sample, **options).summary(html_partial)
+                        for options in OPTION_SETS],
+                    [result['summary'] for result in results])
+
+    def test_page_is_prepared_once(self):
+        page = PreparedPage(load_sample('sample1.html'))
+        page.evaluate(OPTION_SETS)
+        html = page.html
+        trees = dict(page.trees)
+        page.evaluate(OPTION_SETS)
+        self.assertTrue(html is page.html)
+        self.assertEqual(trees, page.trees)
+
+    def test_unsupported_options(self):
+        self.assertRaises(ValueError, evaluate, load_sample('sample1.html'),
+            [{'min_readable_score': 0.5}])
+
+    def test_sweep(self):
+        pages = [load_sample(name) for name in SAMPLES]
+        self.assertEqual([evaluate(page, OPTION_SETS) for page in pages],
+            sweep(pages, OPTION_SETS, processes=2))